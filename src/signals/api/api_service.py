@@ -9,6 +9,28 @@ class APIService:
     提供信号系统的外部访问接口
     """
 
+    # 各接口必要参数
+    GENERATE_SIGNAL_PARAMS = frozenset({'asset', 'signal_type', 'strength', 'confidence', 'trigger_conditions'})
+    AI_ANALYSIS_PARAMS = frozenset({'ai_analysis', 'market_data'})
+    SET_THRESHOLDS_PARAMS = frozenset({'user_id', 'thresholds'})
+    UPDATE_OUTCOME_PARAMS = frozenset({'signal_id', 'outcome'})
+
+    # 对外提供的接口列表（不可变，可在响应间共享）
+    ENDPOINTS = (
+        "/api/signals/generate",
+        "/api/signals/generate-from-ai",
+        "/api/signals/evaluate",
+        "/api/signals/classify",
+        "/api/thresholds/set",
+        "/api/thresholds/get",
+        "/api/history/signals",
+        "/api/history/statistics",
+        "/api/history/accuracy",
+        "/api/history/update-outcome",
+        "/api/notifications/history",
+        "/api/service/info"
+    )
+
     def __init__(self, signal_generator=None, signal_evaluator=None, signal_classifier=None, notification_service=None, history_service=None):
         """
         初始化 API 服务
@@ -47,10 +69,9 @@ class APIService:
                 return self._error_response("Signal generator not available")
 
             # 验证请求参数
-            required_params = ['asset', 'signal_type', 'strength', 'confidence', 'trigger_conditions']
-            for param in required_params:
-                if param not in request:
-                    return self._error_response(f"Missing required parameter: {param}")
+            missing_params = self.GENERATE_SIGNAL_PARAMS - request.keys()
+            if missing_params:
+                return self._error_response(f"Missing required parameter: {', '.join(sorted(missing_params))}")
 
             # 生成信号
             signal = self.signal_generator.generate_signal(
@@ -95,7 +116,7 @@ class APIService:
                 return self._error_response("Signal generator not available")
 
             # 验证请求参数
-            if 'ai_analysis' not in request or 'market_data' not in request:
+            if self.AI_ANALYSIS_PARAMS - request.keys():
                 return self._error_response("Missing required parameters: ai_analysis and market_data")
 
             # 生成信号
@@ -107,12 +128,21 @@ class APIService:
             if not signals:
                 return self._error_response("Failed to generate signals from AI analysis")
 
-            # 添加到历史记录并发送通知
-            for signal in signals:
-                if self.history_service:
-                    self.history_service.add_signal_to_history(signal)
-                if self.notification_service:
-                    self.notification_service.check_and_send_notifications(signal)
+            # 整批添加到历史记录并发送通知 (注入的服务没有批量方法时逐条处理)
+            if self.history_service:
+                add_signals = getattr(self.history_service, 'add_signals_to_history', None)
+                if add_signals is not None:
+                    add_signals(signals)
+                else:
+                    for signal in signals:
+                        self.history_service.add_signal_to_history(signal)
+            if self.notification_service:
+                send_batch = getattr(self.notification_service, 'check_and_send_notifications_batch', None)
+                if send_batch is not None:
+                    send_batch(signals)
+                else:
+                    for signal in signals:
+                        self.notification_service.check_and_send_notifications(signal)
 
             return self._success_response(signals)
 
@@ -198,7 +228,7 @@ class APIService:
                 return self._error_response("Notification service not available")
 
             # 验证请求参数
-            if 'user_id' not in request or 'thresholds' not in request:
+            if self.SET_THRESHOLDS_PARAMS - request.keys():
                 return self._error_response("Missing required parameters: user_id and thresholds")
 
             # 设置阈值
@@ -335,7 +365,7 @@ class APIService:
                 return self._error_response("History service not available")
 
             # 验证请求参数
-            if 'signal_id' not in request or 'outcome' not in request:
+            if self.UPDATE_OUTCOME_PARAMS - request.keys():
                 return self._error_response("Missing required parameters: signal_id and outcome")
 
             # 更新结果
@@ -396,20 +426,7 @@ class APIService:
                     "notification_service": self.notification_service is not None,
                     "history_service": self.history_service is not None
                 },
-                "endpoints": [
-                    "/api/signals/generate",
-                    "/api/signals/generate-from-ai",
-                    "/api/signals/evaluate",
-                    "/api/signals/classify",
-                    "/api/thresholds/set",
-                    "/api/thresholds/get",
-                    "/api/history/signals",
-                    "/api/history/statistics",
-                    "/api/history/accuracy",
-                    "/api/history/update-outcome",
-                    "/api/notifications/history",
-                    "/api/service/info"
-                ]
+                "endpoints": self.ENDPOINTS
             }
 
             return self._success_response(info)
@@ -1,7 +1,70 @@
 # Signal Classifier
 
 import logging
-from typing import Dict, List, Optional, Any
+import math
+import sys
+from bisect import bisect_right
+from collections import Counter
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Any
+
+# 含连字符的类别标签不会被编译器自动驻留，显式驻留以便比较和计数时复用同一对象
+TIME_SENSITIVE = sys.intern('time-sensitive')
+NON_URGENT = sys.intern('non-urgent')
+
+# 资产分类表
+MAJOR_CRYPTOS = frozenset({'BTC', 'ETH'})
+SECONDARY_CRYPTOS = frozenset({'SOL', 'ADA', 'DOT', 'DOGE', 'SHIB'})
+STABLECOINS = frozenset({'USDT', 'USDC', 'DAI', 'BUSD'})
+TRADITIONAL_ASSETS = frozenset({'GOLD', 'SILVER', 'USD', 'EUR', 'JPY'})
+DERIVATIVE_SUFFIXES = ('BTC', 'ETH', 'SOL')
+
+ASSET_CLASSES = {
+    **dict.fromkeys(MAJOR_CRYPTOS, 'major_crypto'),
+    **dict.fromkeys(SECONDARY_CRYPTOS, 'secondary_crypto'),
+    **dict.fromkeys(STABLECOINS, 'stablecoin'),
+    **dict.fromkeys(TRADITIONAL_ASSETS, 'traditional_asset'),
+}
+# (信号类型, 市场趋势) -> 趋势一致性，未列出的组合为 partially_aligned
+TREND_ALIGNMENT = {
+    ('buy', 'up'): 'strongly_aligned',
+    ('sell', 'down'): 'strongly_aligned',
+    ('buy', 'down'): 'opposite',
+    ('sell', 'up'): 'opposite',
+    ('hold', 'neutral'): 'aligned',
+}
+
+# 缺少市场数据时共用的只读空字典，避免每次分类都分配新对象
+_EMPTY_MARKET_DATA = {}
+
+# 一次取出分类所需的核心字段
+_core_fields = itemgetter('type', 'strength', 'confidence')
+
+def _compile_threshold_classifier(bounds: List[Any], labels: List[str], fallback: str):
+    """
+    将阈值作为常量生成专用的分类函数
+
+    Args:
+        bounds: 升序阈值列表
+        labels: 与阈值对应的类别标签
+        fallback: 低于所有阈值时的类别
+
+    Returns:
+        分类函数；阈值不是有限数值时返回 None
+    """
+    if not all(isinstance(bound, (int, float)) and math.isfinite(bound) for bound in bounds):
+        return None
+
+    # 阈值先转换为内置数值，numpy 标量在 NumPy 2 下的 repr (np.float64(...)) 不是合法的常量
+    lines = ["def classify(value):"]
+    for bound, label in reversed(list(zip(bounds, labels))):
+        literal = int(bound) if isinstance(bound, int) else float(bound)
+        lines.append(f"    if value >= {literal!r}: return {label!r}")
+    lines.append(f"    return {fallback!r}")
+
+    namespace = {}
+    exec(compile("\n".join(lines), "<signal_classifier thresholds>", "exec"), namespace)
+    return namespace['classify']
 
 class SignalClassifier:
     """
@@ -9,6 +72,9 @@ class SignalClassifier:
     对信号进行多维度分类和级别评估
     """
 
+    # 信号必要字段
+    REQUIRED_FIELDS = frozenset({'signal_id', 'asset', 'type', 'strength', 'confidence'})
+
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         """
         初始化信号分类器
@@ -34,6 +100,45 @@ class SignalClassifier:
             'low': 0.3
         })
 
+        self._build_threshold_tables(self.strength_thresholds, self.confidence_thresholds)
+
+    def _build_threshold_tables(self, strength_thresholds: Dict[str, Any], confidence_thresholds: Dict[str, Any]):
+        """
+        将强度和置信度阈值预排序为升序边界数组，供二分查找使用
+        配置中的标签可能来自运行时字符串，统一驻留
+        阈值均为数值时，再生成阈值内联为常量的专用函数覆盖实例上的分类方法
+        全部构建成功后才替换配置和边界数组，构建失败时保持原有配置不变
+
+        Args:
+            strength_thresholds: 强度阈值
+            confidence_thresholds: 置信度阈值
+        """
+        strength_items = sorted(strength_thresholds.items(), key=lambda item: item[1])
+        strength_bounds = [bound for _, bound in strength_items]
+        strength_labels = [sys.intern(label) for label, _ in strength_items]
+
+        confidence_items = sorted(confidence_thresholds.items(), key=lambda item: item[1])
+        confidence_bounds = [bound for _, bound in confidence_items]
+        confidence_labels = [sys.intern(label) for label, _ in confidence_items]
+
+        strength_classifier = _compile_threshold_classifier(strength_bounds, strength_labels, 'very_weak')
+        confidence_classifier = _compile_threshold_classifier(confidence_bounds, confidence_labels, 'very_low')
+
+        self.strength_thresholds = strength_thresholds
+        self._strength_bounds = strength_bounds
+        self._strength_labels = strength_labels
+        self.confidence_thresholds = confidence_thresholds
+        self._confidence_bounds = confidence_bounds
+        self._confidence_labels = confidence_labels
+
+        # 替换专用函数，阈值无法编译时回退到二分查找
+        self.__dict__.pop('_classify_strength', None)
+        self.__dict__.pop('_classify_confidence', None)
+        if strength_classifier:
+            self._classify_strength = strength_classifier
+        if confidence_classifier:
+            self._classify_confidence = confidence_classifier
+
     def classify_signal(self, signal: Dict[str, Any]) -> Dict[str, Any]:
         """
         分类信号
@@ -50,20 +155,26 @@ class SignalClassifier:
                 self.logger.error("Invalid signal for classification")
                 return None
 
+            signal_type, strength, confidence = _core_fields(signal)
+
+            # 各维度只计算一次，综合分类复用其结果
+            level = self._classify_level(strength, confidence)
+            risk_level = self._classify_risk(signal_type, strength, confidence)
+
             # 分类结果
             classification = {
                 'signal_id': signal['signal_id'],
-                'strength_category': self._classify_strength(signal['strength']),
-                'confidence_category': self._classify_confidence(signal['confidence']),
-                'level': self._classify_level(signal),
-                'risk_level': self._classify_risk(signal),
-                'time_sensitivity': self._classify_time_sensitivity(signal),
+                'strength_category': self._classify_strength(strength),
+                'confidence_category': self._classify_confidence(confidence),
+                'level': level,
+                'risk_level': risk_level,
+                'time_sensitivity': self._classify_time_sensitivity(signal_type, strength, confidence),
                 'asset_class': self._classify_asset(signal),
                 'trend_alignment': self._classify_trend_alignment(signal),
-                'comprehensive_category': self._classify_comprehensive(signal)
+                'comprehensive_category': self._classify_comprehensive(level, risk_level)
             }
 
-            self.logger.info(f"Classified signal {signal['signal_id']} as {classification['level']} level")
+            self.logger.debug("Classified signal %s as %s level", signal['signal_id'], level)
 
             return classification
 
@@ -71,30 +182,36 @@ class SignalClassifier:
             self.logger.error(f"Error classifying signal: {str(e)}")
             return None
 
-    def classify_multiple_signals(self, signals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def classify_multiple_signals(self, signals: List[Dict[str, Any]], inplace: bool = False) -> List[Dict[str, Any]]:
         """
         分类多个信号
 
         Args:
             signals: 信号列表
+            inplace: 是否直接在原信号上写入分类结果（不复制信号）
 
         Returns:
             分类结果列表
         """
-        try:
-            classified_signals = []
-            for signal in signals:
-                classification = self.classify_signal(signal)
-                if classification:
-                    signal_with_classification = signal.copy()
-                    signal_with_classification['classification'] = classification
-                    classified_signals.append(signal_with_classification)
+        return list(self.iter_classify(signals, inplace=inplace))
 
-            return classified_signals
+    def iter_classify(self, signals: Iterable[Dict[str, Any]], inplace: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        逐个分类信号并流式返回，不构建中间列表
 
-        except Exception as e:
-            self.logger.error(f"Error classifying multiple signals: {str(e)}")
-            return []
+        Args:
+            signals: 信号序列
+            inplace: 是否直接在原信号上写入分类结果（不复制信号）
+
+        Yields:
+            带分类结果的信号，分类失败的信号被跳过
+        """
+        for signal in signals:
+            classification = self.classify_signal(signal)
+            if classification:
+                signal_with_classification = signal if inplace else signal.copy()
+                signal_with_classification['classification'] = classification
+                yield signal_with_classification
 
     def _validate_signal(self, signal: Dict[str, Any]) -> bool:
         """
@@ -106,27 +223,21 @@ class SignalClassifier:
         Returns:
             是否有效
         """
-        try:
-            required_fields = ['signal_id', 'asset', 'type', 'strength', 'confidence']
-            for field in required_fields:
-                if field not in signal:
-                    self.logger.error(f"Missing required field {field} in signal")
-                    return False
-
-            if not 1 <= signal['strength'] <= 10:
-                self.logger.error(f"Invalid signal strength: {signal['strength']}")
-                return False
-
-            if not 0 <= signal['confidence'] <= 1:
-                self.logger.error(f"Invalid signal confidence: {signal['confidence']}")
-                return False
+        missing_fields = self.REQUIRED_FIELDS - signal.keys()
+        if missing_fields:
+            self.logger.error(f"Missing required fields {sorted(missing_fields)} in signal")
+            return False
 
-            return True
+        if not 1 <= signal['strength'] <= 10:
+            self.logger.error(f"Invalid signal strength: {signal['strength']}")
+            return False
 
-        except Exception as e:
-            self.logger.error(f"Error validating signal: {str(e)}")
+        if not 0 <= signal['confidence'] <= 1:
+            self.logger.error(f"Invalid signal confidence: {signal['confidence']}")
             return False
 
+        return True
+
     def _classify_strength(self, strength: int) -> str:
         """
         分类信号强度
@@ -137,16 +248,8 @@ class SignalClassifier:
         Returns:
             强度类别
         """
-        if strength >= self.strength_thresholds['extreme']:
-            return 'extreme'
-        elif strength >= self.strength_thresholds['strong']:
-            return 'strong'
-        elif strength >= self.strength_thresholds['medium']:
-            return 'medium'
-        elif strength >= self.strength_thresholds['weak']:
-            return 'weak'
-        else:
-            return 'very_weak'
+        index = bisect_right(self._strength_bounds, strength)
+        return self._strength_labels[index - 1] if index else 'very_weak'
 
     def _classify_confidence(self, confidence: float) -> str:
         """
@@ -158,28 +261,20 @@ class SignalClassifier:
         Returns:
             置信度类别
         """
-        if confidence >= self.confidence_thresholds['high']:
-            return 'high'
-        elif confidence >= self.confidence_thresholds['medium']:
-            return 'medium'
-        elif confidence >= self.confidence_thresholds['low']:
-            return 'low'
-        else:
-            return 'very_low'
+        index = bisect_right(self._confidence_bounds, confidence)
+        return self._confidence_labels[index - 1] if index else 'very_low'
 
-    def _classify_level(self, signal: Dict[str, Any]) -> str:
+    def _classify_level(self, strength: int, confidence: float) -> str:
         """
         分类信号级别
 
         Args:
-            signal: 信号对象
+            strength: 信号强度
+            confidence: 信号置信度
 
         Returns:
             信号级别
         """
-        strength = signal['strength']
-        confidence = signal['confidence']
-
         # 计算综合分数
         composite_score = (strength / 10) * 0.6 + confidence * 0.4
 
@@ -194,20 +289,18 @@ class SignalClassifier:
         else:
             return 'very_weak'
 
-    def _classify_risk(self, signal: Dict[str, Any]) -> str:
+    def _classify_risk(self, signal_type: str, strength: int, confidence: float) -> str:
         """
         分类信号风险等级
 
         Args:
-            signal: 信号对象
+            signal_type: 信号类型
+            strength: 信号强度
+            confidence: 信号置信度
 
         Returns:
             风险等级
         """
-        signal_type = signal['type']
-        strength = signal['strength']
-        confidence = signal['confidence']
-
         # 基础风险评估
         base_risk = 0.5
 
@@ -239,20 +332,18 @@ class SignalClassifier:
         else:
             return 'low'
 
-    def _classify_time_sensitivity(self, signal: Dict[str, Any]) -> str:
+    def _classify_time_sensitivity(self, signal_type: str, strength: int, confidence: float) -> str:
         """
         分类信号时间敏感度
 
         Args:
-            signal: 信号对象
+            signal_type: 信号类型
+            strength: 信号强度
+            confidence: 信号置信度
 
         Returns:
             时间敏感度
         """
-        signal_type = signal['type']
-        strength = signal['strength']
-        confidence = signal['confidence']
-
         # 计算时间敏感度分数
         sensitivity_score = 0.5
 
@@ -274,9 +365,9 @@ class SignalClassifier:
         if sensitivity_score >= 0.8:
             return 'urgent'
         elif sensitivity_score >= 0.5:
-            return 'time-sensitive'
+            return TIME_SENSITIVE
         else:
-            return 'non-urgent'
+            return NON_URGENT
 
     def _classify_asset(self, signal: Dict[str, Any]) -> str:
         """
@@ -290,29 +381,15 @@ class SignalClassifier:
         """
         asset = signal['asset'].upper()
 
-        # 主流加密货币
-        major_cryptos = ['BTC', 'ETH']
-        if asset in major_cryptos:
-            return 'major_crypto'
-
-        # 二线加密货币
-        secondary_cryptos = ['SOL', 'ADA', 'DOT', 'DOGE', 'SHIB']
-        if asset in secondary_cryptos:
-            return 'secondary_crypto'
-
-        # 稳定币
-        stablecoins = ['USDT', 'USDC', 'DAI', 'BUSD']
-        if asset in stablecoins:
-            return 'stablecoin'
+        # 已知资产直接查表
+        asset_class = ASSET_CLASSES.get(asset)
+        if asset_class is not None:
+            return asset_class
 
         # 其他加密货币
-        if asset.endswith('BTC') or asset.endswith('ETH') or asset.endswith('SOL'):
+        if asset.endswith(DERIVATIVE_SUFFIXES):
             return 'derivative_crypto'
 
-        # 非加密货币资产
-        if asset in ['GOLD', 'SILVER', 'USD', 'EUR', 'JPY']:
-            return 'traditional_asset'
-
         # 默认分类
         return 'other_crypto'
 
@@ -327,37 +404,23 @@ class SignalClassifier:
             趋势一致性
         """
         signal_type = signal['type']
-        market_data = signal.get('market_data', {})
+        market_data = signal.get('market_data') or _EMPTY_MARKET_DATA
         market_trend = market_data.get('market_trend', 'neutral')
 
         # 评估趋势一致性
-        if signal_type == 'buy' and market_trend == 'up':
-            return 'strongly_aligned'
-        elif signal_type == 'sell' and market_trend == 'down':
-            return 'strongly_aligned'
-        elif signal_type == 'buy' and market_trend == 'down':
-            return 'opposite'
-        elif signal_type == 'sell' and market_trend == 'up':
-            return 'opposite'
-        elif signal_type == 'hold' and market_trend == 'neutral':
-            return 'aligned'
-        else:
-            return 'partially_aligned'
+        return TREND_ALIGNMENT.get((signal_type, market_trend), 'partially_aligned')
 
-    def _classify_comprehensive(self, signal: Dict[str, Any]) -> str:
+    def _classify_comprehensive(self, level: str, risk_level: str) -> str:
         """
         综合分类信号
 
         Args:
-            signal: 信号对象
+            level: 信号级别
+            risk_level: 风险等级
 
         Returns:
             综合分类
         """
-        level = self._classify_level(signal)
-        risk_level = self._classify_risk(signal)
-        time_sensitivity = self._classify_time_sensitivity(signal)
-
         # 综合分类逻辑
         if level in ['extreme', 'strong'] and risk_level in ['medium', 'low']:
             return 'high_quality'
@@ -372,75 +435,57 @@ class SignalClassifier:
         else:
             return 'standard'
 
-    def get_signal_statistics(self, signals: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def get_signal_statistics(self, signals: List[Dict[str, Any]], classifications: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         """
         获取信号分类统计信息
 
         Args:
             signals: 信号列表
+            classifications: 已有的分类结果列表（与 signals 一一对应），为空时重新分类
 
         Returns:
             统计信息
         """
-        try:
-            if not signals:
-                return {
-                    'total_signals': 0,
-                    'level_distribution': {},
-                    'risk_distribution': {},
-                    'type_distribution': {},
-                    'asset_class_distribution': {},
-                    'time_sensitivity_distribution': {}
-                }
-
-            # 分类所有信号
-            classified_signals = self.classify_multiple_signals(signals)
-
-            # 计算基本统计
-            total_signals = len(classified_signals)
-
-            # 计算级别分布
-            level_distribution = {}
-            for signal in classified_signals:
-                level = signal['classification']['level']
-                level_distribution[level] = level_distribution.get(level, 0) + 1
-
-            # 计算风险分布
-            risk_distribution = {}
-            for signal in classified_signals:
-                risk = signal['classification']['risk_level']
-                risk_distribution[risk] = risk_distribution.get(risk, 0) + 1
-
-            # 计算类型分布
-            type_distribution = {}
-            for signal in classified_signals:
-                signal_type = signal['type']
-                type_distribution[signal_type] = type_distribution.get(signal_type, 0) + 1
-
-            # 计算资产类别分布
-            asset_class_distribution = {}
-            for signal in classified_signals:
-                asset_class = signal['classification']['asset_class']
-                asset_class_distribution[asset_class] = asset_class_distribution.get(asset_class, 0) + 1
-
-            # 计算时间敏感度分布
-            time_sensitivity_distribution = {}
-            for signal in classified_signals:
-                sensitivity = signal['classification']['time_sensitivity']
-                time_sensitivity_distribution[sensitivity] = time_sensitivity_distribution.get(sensitivity, 0) + 1
-
+        if not signals:
             return {
-                'total_signals': total_signals,
-                'level_distribution': level_distribution,
-                'risk_distribution': risk_distribution,
-                'type_distribution': type_distribution,
-                'asset_class_distribution': asset_class_distribution,
-                'time_sensitivity_distribution': time_sensitivity_distribution
+                'total_signals': 0,
+                'level_distribution': {},
+                'risk_distribution': {},
+                'type_distribution': {},
+                'asset_class_distribution': {},
+                'time_sensitivity_distribution': {}
             }
 
-        except Exception as e:
-            self.logger.error(f"Error getting signal statistics: {str(e)}")
-            return {}
+        # 分类所有信号（已分类时直接复用）
+        if classifications is None:
+            classifications = (self.classify_signal(signal) for signal in signals)
+
+        # 单次遍历计算所有分布
+        total_signals = 0
+        level_distribution = Counter()
+        risk_distribution = Counter()
+        type_distribution = Counter()
+        asset_class_distribution = Counter()
+        time_sensitivity_distribution = Counter()
+
+        for signal, classification in zip(signals, classifications):
+            if not classification:
+                continue
+            total_signals += 1
+            level_distribution[classification['level']] += 1
+            risk_distribution[classification['risk_level']] += 1
+            type_distribution[signal['type']] += 1
+            asset_class_distribution[classification['asset_class']] += 1
+            time_sensitivity_distribution[classification['time_sensitivity']] += 1
+
+        return {
+            'total_signals': total_signals,
+            'level_distribution': dict(level_distribution),
+            'risk_distribution': dict(risk_distribution),
+            'type_distribution': dict(type_distribution),
+            'asset_class_distribution': dict(asset_class_distribution),
+            'time_sensitivity_distribution': dict(time_sensitivity_distribution)
+        }
 
     def update_classification_config(self, config: Dict[str, Any]) -> bool:
         """
@@ -453,11 +498,11 @@ class SignalClassifier:
             是否成功
         """
         try:
-            if 'strength_thresholds' in config:
-                self.strength_thresholds = config['strength_thresholds']
-
-            if 'confidence_thresholds' in config:
-                self.confidence_thresholds = config['confidence_thresholds']
+            # 先按新阈值构建查找表，成功后再连同配置一起替换
+            self._build_threshold_tables(
+                config.get('strength_thresholds', self.strength_thresholds),
+                config.get('confidence_thresholds', self.confidence_thresholds)
+            )
 
             self.logger.info("Updated classification config")
             return True
@@ -1,9 +1,147 @@
 # Rule Engine
 
 import logging
-import uuid
+import operator
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Tuple, ValuesView
+
+# 尝试导入数值计算库，用于按时间窗口批量评估数值规则
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    njit = None
+
+def _cross_above(param_value: Any, value: Any) -> bool:
+    # 用于趋势交叉
+    if isinstance(param_value, list) and len(param_value) >= 2:
+        return param_value[-1] > value and param_value[-2] <= value
+    return False
+
+def _cross_below(param_value: Any, value: Any) -> bool:
+    # 用于趋势交叉
+    if isinstance(param_value, list) and len(param_value) >= 2:
+        return param_value[-1] < value and param_value[-2] >= value
+    return False
+
+# 操作符 -> 比较函数 (param_value, value) -> bool
+OPERATORS = {
+    'equals': operator.eq,
+    'not_equals': operator.ne,
+    'greater_than': operator.gt,
+    'less_than': operator.lt,
+    'greater_than_or_equal': operator.ge,
+    'less_than_or_equal': operator.le,
+    'contains': lambda param_value, value: value in param_value,
+    'not_contains': lambda param_value, value: value not in param_value,
+    'cross_above': _cross_above,
+    'cross_below': _cross_below
+}
+
+# 操作符 -> 生成求值代码时使用的表达式模板，{p} 为参数值，{v} 为比较值（与 OPERATORS 语义一致）
+OPERATOR_EXPRESSIONS = {
+    'equals': '{p} == {v}',
+    'not_equals': '{p} != {v}',
+    'greater_than': '{p} > {v}',
+    'less_than': '{p} < {v}',
+    'greater_than_or_equal': '{p} >= {v}',
+    'less_than_or_equal': '{p} <= {v}',
+    'contains': '{v} in {p}',
+    'not_contains': '{v} not in {p}',
+    'cross_above': '_cross_above({p}, {v})',
+    'cross_below': '_cross_below({p}, {v})'
+}
+
+# 操作符求值成本：相等/大小比较最廉价，成员检查需扫描容器，交叉判断需读取多个元素
+OPERATOR_COSTS = {
+    'equals': 0,
+    'not_equals': 0,
+    'greater_than': 1,
+    'less_than': 1,
+    'greater_than_or_equal': 1,
+    'less_than_or_equal': 1,
+    'contains': 3,
+    'not_contains': 3,
+    'cross_above': 4,
+    'cross_below': 4
+}
+
+# 可以按数值数组批量比较的操作符
+NUMERIC_OPERATOR_CODES = {
+    'equals': 0,
+    'not_equals': 1,
+    'greater_than': 2,
+    'less_than': 3,
+    'greater_than_or_equal': 4,
+    'less_than_or_equal': 5
+}
+
+# float64 能精确表示的整数范围
+_MAX_EXACT_INT = 2 ** 53
+
+def _is_exact_number(value: Any) -> bool:
+    """
+    判断值能否无损地转为 float64 参与批量比较
+    """
+    value_type = type(value)
+    if value_type is float:
+        return True
+    return value_type is int and -_MAX_EXACT_INT <= value <= _MAX_EXACT_INT
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _compare_numeric_kernel(op_code, values, threshold, out):
+        """
+        按操作符编码逐元素比较（编码见 NUMERIC_OPERATOR_CODES）
+        """
+        for i in range(values.shape[0]):
+            value = values[i]
+            if op_code == 0:
+                out[i] = value == threshold
+            elif op_code == 1:
+                out[i] = value != threshold
+            elif op_code == 2:
+                out[i] = value > threshold
+            elif op_code == 3:
+                out[i] = value < threshold
+            elif op_code == 4:
+                out[i] = value >= threshold
+            else:
+                out[i] = value <= threshold
+elif NUMPY_AVAILABLE:
+    _NUMPY_COMPARATORS = (np.equal, np.not_equal, np.greater, np.less, np.greater_equal, np.less_equal)
+
+    def _compare_numeric_kernel(op_code, values, threshold, out):
+        _NUMPY_COMPARATORS[op_code](values, threshold, out=out)
+
+def _lookup(data: Any, path: tuple) -> Any:
+    """
+    按预先拆分的路径查找参数值，路径不存在时返回 None
+    """
+    value = data
+    for part in path:
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        else:
+            return None
+    return value
+
+def _never(data: Dict[str, Any]) -> bool:
+    return False
+
+def _priority_key(rule: Dict[str, Any]) -> Any:
+    # 优先级降序排序键，稳定排序保证同优先级规则保持添加顺序
+    return -rule.get('priority', 5)
 
 class RuleEngine:
     """
@@ -11,6 +149,9 @@ class RuleEngine:
     管理和执行信号生成规则
     """
 
+    # 支持的规则类型；组合规则的条件可以嵌套子规则，其余类型的条件均按 AND 逐条求值
+    RULE_TYPES = frozenset({'threshold', 'trend', 'composite', 'anomaly', 'pattern'})
+
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         """
         初始化规则引擎
@@ -24,14 +165,29 @@ class RuleEngine:
         # 规则存储
         self.rules = {}
 
-        # 规则类型处理器
-        self.rule_handlers = {
-            'threshold': self._handle_threshold_rule,
-            'trend': self._handle_trend_rule,
-            'composite': self._handle_composite_rule,
-            'anomaly': self._handle_anomaly_rule,
-            'pattern': self._handle_pattern_rule
-        }
+        # 预编译的规则求值函数 (rule_id -> Callable[[data], bool])
+        self._compiled_rules = {}
+
+        # 按类型索引的规则 (rule_type -> {rule_id: rule})
+        self._rules_by_type = {}
+
+        # 并行评估（可选）：规则求值只读取数据，可安全地分片并行
+        # 注意：纯 Python 的规则求值受 GIL 限制，线程并行不会带来加速；仅在条件求值释放 GIL
+        # （如调用 numpy 等 C 扩展）或运行在无 GIL 的解释器上时才有收益，默认关闭。使用后需调用 close()
+        self.parallel_workers = self.config.get('workers', os.cpu_count() or 1)
+        self.parallel_min_rules = self.config.get('parallel_min_rules', 64)
+        self.executor = None
+        if self.config.get('parallel'):
+            if isinstance(self.parallel_workers, int) and not isinstance(self.parallel_workers, bool) and self.parallel_workers >= 1:
+                self.executor = ThreadPoolExecutor(max_workers=self.parallel_workers)
+            else:
+                # 无效的工作线程数（非正整数）回退为串行评估
+                self.logger.error(f"Invalid workers value: {self.parallel_workers!r}, falling back to serial rule evaluation")
+                self.parallel_workers = 1
+
+        # 按优先级排序的启用规则缓存，仅在规则变更后重建
+        self._enabled_rules = []
+        self._rules_dirty = False
 
     def add_rule(self, rule: Dict[str, Any]) -> str:
         """
@@ -40,6 +196,19 @@ class RuleEngine:
         Args:
             rule: 规则对象
 
+        Returns:
+            规则 ID
+        """
+        return self._add_rule(rule, datetime.now().isoformat())
+
+    def _add_rule(self, rule: Dict[str, Any], now: str) -> str:
+        """
+        添加规则，使用调用方提供的时间戳（批量加载时整批共用一个时间戳）
+
+        Args:
+            rule: 规则对象
+            now: ISO 格式时间戳
+
         Returns:
             规则 ID
         """
@@ -49,16 +218,21 @@ class RuleEngine:
                 raise ValueError("Invalid rule")
 
             # 生成规则 ID
-            rule_id = rule.get('rule_id', f"rule_{uuid.uuid4().hex[:8]}")
+            rule_id = rule['rule_id'] if 'rule_id' in rule else f"rule_{os.urandom(4).hex()}"
             rule['rule_id'] = rule_id
 
             # 设置规则元数据
-            rule['created_at'] = datetime.now().isoformat()
-            rule['updated_at'] = datetime.now().isoformat()
+            rule['created_at'] = now
+            rule['updated_at'] = now
             rule['status'] = rule.get('status', 'enabled')
 
-            # 添加规则
+            # 添加规则（同 ID 的旧规则先移出类型索引）
+            if rule_id in self.rules:
+                self._unindex_rule(self.rules[rule_id])
             self.rules[rule_id] = rule
+            self._index_rule(rule)
+            self._compiled_rules[rule_id] = self._compile_rule(rule)
+            self._rules_dirty = True
             self.logger.info(f"Added rule: {rule_id} - {rule.get('name')}")
 
             return rule_id
@@ -79,7 +253,9 @@ class RuleEngine:
         """
         try:
             if rule_id in self.rules:
-                del self.rules[rule_id]
+                self._unindex_rule(self.rules.pop(rule_id))
+                self._compiled_rules.pop(rule_id, None)
+                self._rules_dirty = True
                 self.logger.info(f"Removed rule: {rule_id}")
                 return True
             else:
@@ -106,20 +282,28 @@ class RuleEngine:
                 self.logger.warning(f"Rule not found: {rule_id}")
                 return False
 
-            # 获取原始规则
-            rule = self.rules[rule_id].copy()
+            # 只快照被更新的字段用于回滚，原地应用更新
+            rule = self.rules[rule_id]
+            missing = object()
+            rollback = {key: rule.get(key, missing) for key in updates}
+            self._unindex_rule(rule)
+            rule.update(updates)
 
-            # 应用更新
-            for key, value in updates.items():
-                rule[key] = value
-
-            # 验证更新后的规则
+            # 验证更新后的规则，失败时回滚
             if not self._validate_rule(rule):
+                for key, value in rollback.items():
+                    if value is missing:
+                        del rule[key]
+                    else:
+                        rule[key] = value
+                self._index_rule(rule)
                 raise ValueError("Invalid rule after updates")
 
             # 更新规则
             rule['updated_at'] = datetime.now().isoformat()
-            self.rules[rule_id] = rule
+            self._index_rule(rule)
+            self._compiled_rules[rule_id] = self._compile_rule(rule)
+            self._rules_dirty = True
             self.logger.info(f"Updated rule: {rule_id}")
 
             return True
@@ -149,6 +333,15 @@ class RuleEngine:
         """
         return list(self.rules.values())
 
+    def iter_rules(self) -> ValuesView[Dict[str, Any]]:
+        """
+        获取规则的只读视图，用于只需遍历一次的场景，避免复制列表
+
+        Returns:
+            规则视图
+        """
+        return self.rules.values()
+
     def get_rules_by_type(self, rule_type: str) -> List[Dict[str, Any]]:
         """
         按类型获取规则
@@ -159,359 +352,339 @@ class RuleEngine:
         Returns:
             规则列表
         """
-        return [rule for rule in self.rules.values() if rule.get('type') == rule_type]
+        rules = self._rules_by_type.get(rule_type)
+        return list(rules.values()) if rules else []
 
-    def evaluate_rules(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _index_rule(self, rule: Dict[str, Any]):
         """
-        评估规则
+        将规则加入类型索引
 
         Args:
-            data: 评估数据
-
-        Returns:
-            匹配的规则列表
+            rule: 规则对象
         """
-        try:
-            matched_rules = []
-
-            # 按优先级排序规则
-            sorted_rules = sorted(
-                self.rules.values(),
-                key=lambda r: r.get('priority', 5),
-                reverse=True
-            )
-
-            # 评估每个规则
-            for rule in sorted_rules:
-                # 跳过禁用的规则
-                if rule.get('status') != 'enabled':
-                    continue
-
-                # 评估规则
-                if self._evaluate_rule(rule, data):
-                    matched_rules.append(rule)
-                    self.logger.info(f"Rule matched: {rule['rule_id']} - {rule['name']}")
+        self._rules_by_type.setdefault(rule['type'], {})[rule['rule_id']] = rule
 
-            return matched_rules
+    def _unindex_rule(self, rule: Dict[str, Any]):
+        """
+        将规则移出类型索引
 
-        except Exception as e:
-            self.logger.error(f"Error evaluating rules: {str(e)}")
-            return []
+        Args:
+            rule: 规则对象
+        """
+        rules = self._rules_by_type.get(rule['type'])
+        if rules:
+            rules.pop(rule['rule_id'], None)
 
-    def _validate_rule(self, rule: Dict[str, Any]) -> bool:
+    def evaluate_rules(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
-        验证规则
+        评估规则
 
         Args:
-            rule: 规则对象
+            data: 评估数据
 
         Returns:
-            是否有效
+            匹配的规则列表
         """
         try:
-            # 检查必要字段
-            required_fields = ['name', 'description', 'type', 'conditions', 'actions']
-            for field in required_fields:
-                if field not in rule:
-                    self.logger.error(f"Missing required field {field} in rule")
-                    return False
-
-            # 检查规则类型
-            rule_type = rule['type']
-            if rule_type not in self.rule_handlers:
-                self.logger.error(f"Invalid rule type: {rule_type}")
-                return False
+            # 启用的规则（已按优先级排序）
+            enabled_rules = self._get_enabled_rules()
 
-            # 检查条件
-            conditions = rule['conditions']
-            if not isinstance(conditions, list) or not conditions:
-                self.logger.error("Invalid rule conditions")
-                return False
+            if self.executor is None or len(enabled_rules) < self.parallel_min_rules:
+                return self._evaluate_shard(enabled_rules, data)
 
-            # 检查动作
-            actions = rule['actions']
-            if not isinstance(actions, list) or not actions:
-                self.logger.error("Invalid rule actions")
-                return False
+            # 按优先级顺序切分为连续分片并行评估，按分片顺序合并以保持优先级顺序
+            shard_size = -(-len(enabled_rules) // self.parallel_workers)
+            shards = [enabled_rules[i:i + shard_size] for i in range(0, len(enabled_rules), shard_size)]
 
-            # 检查优先级
-            if 'priority' in rule and not (1 <= rule['priority'] <= 10):
-                self.logger.error("Invalid rule priority")
-                return False
+            matched_rules = []
+            for shard_matches in self.executor.map(self._evaluate_shard, shards, [data] * len(shards)):
+                matched_rules.extend(shard_matches)
 
-            return True
+            return matched_rules
 
         except Exception as e:
-            self.logger.error(f"Error validating rule: {str(e)}")
-            return False
+            self.logger.error(f"Error evaluating rules: {str(e)}")
+            return []
 
-    def _evaluate_rule(self, rule: Dict[str, Any], data: Dict[str, Any]) -> bool:
+    def _evaluate_shard(self, rules: List[Dict[str, Any]], data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
-        评估单个规则
+        依次评估一组规则
 
         Args:
-            rule: 规则对象
+            rules: (规则, 求值函数) 列表
             data: 评估数据
 
         Returns:
-            是否匹配
+            匹配的规则列表
         """
-        try:
-            rule_type = rule['type']
-            conditions = rule['conditions']
+        matched_rules = []
+        log_matches = self.logger.isEnabledFor(logging.INFO)
+        for rule, evaluator in rules:
+            # 评估规则（使用预编译的求值函数）
+            # 条件在编译时已校验，这里只需兜住比较本身的类型错误，且不影响其他规则
+            try:
+                matched = evaluator(data)
+            except Exception as e:
+                self.logger.error("Error evaluating rule %s: %s", rule.get('rule_id'), e)
+                continue
 
-            # 使用对应的处理器评估规则
-            if rule_type in self.rule_handlers:
-                return self.rule_handlers[rule_type](conditions, data)
-            else:
-                self.logger.error(f"No handler for rule type: {rule_type}")
-                return False
+            if matched:
+                matched_rules.append(rule)
+                if log_matches:
+                    self.logger.info("Rule matched: %s - %s", rule['rule_id'], rule['name'])
 
-        except Exception as e:
-            self.logger.error(f"Error evaluating rule: {str(e)}")
-            return False
+        return matched_rules
 
-    def _handle_threshold_rule(self, conditions: List[Dict[str, Any]], data: Dict[str, Any]) -> bool:
+    def evaluate_rule_batch(self, rule_id: str, data_batch: List[Dict[str, Any]]) -> List[bool]:
         """
-        处理阈值规则
+        对一个时间窗口内的多条数据批量评估单个规则
+
+        规则的条件全部是数值比较时，按条件提取整列参数值并用编译后的数值内核比较；
+        否则（或缺少 numpy 时）逐条使用预编译的求值函数。
 
         Args:
-            conditions: 规则条件
-            data: 评估数据
+            rule_id: 规则 ID
+            data_batch: 评估数据列表
 
         Returns:
-            是否匹配
+            与 data_batch 一一对应的匹配结果
         """
         try:
-            for condition in conditions:
-                parameter = condition['parameter']
-                operator = condition['operator']
-                value = condition['value']
-
-                # 获取数据中的参数值
-                param_value = self._get_parameter_value(parameter, data)
-                if param_value is None:
-                    return False
+            rule = self.rules.get(rule_id)
+            if rule is None:
+                self.logger.warning(f"Rule not found: {rule_id}")
+                return []
+
+            evaluator = self._compiled_rules.get(rule_id) or self._compile_rule(rule)
+            numeric_conditions = self._numeric_conditions(rule) if NUMPY_AVAILABLE and evaluator is not _never else None
+
+            if numeric_conditions is None:
+                results = []
+                for data in data_batch:
+                    try:
+                        results.append(bool(evaluator(data)))
+                    except Exception:
+                        results.append(False)
+                return results
+
+            size = len(data_batch)
+            matched = np.ones(size, dtype=np.bool_)
+            for path, op_code, compare, threshold in numeric_conditions:
+                values = np.empty(size, dtype=np.float64)
+                non_numeric = []
+                for i, data in enumerate(data_batch):
+                    param_value = _lookup(data, path)
+                    if _is_exact_number(param_value):
+                        values[i] = param_value
+                    else:
+                        values[i] = np.nan
+                        non_numeric.append((i, param_value))
 
-                # 评估条件
-                if not self._evaluate_condition(param_value, operator, value):
-                    return False
+                condition_matched = np.empty(size, dtype=np.bool_)
+                _compare_numeric_kernel(op_code, values, float(threshold), condition_matched)
 
-            return True
+                # 非数值参数按 Python 语义逐个比较
+                for i, param_value in non_numeric:
+                    try:
+                        condition_matched[i] = param_value is not None and bool(compare(param_value, threshold))
+                    except Exception:
+                        condition_matched[i] = False
+
+                matched &= condition_matched
+
+            return matched.tolist()
 
         except Exception as e:
-            self.logger.error(f"Error handling threshold rule: {str(e)}")
-            return False
+            self.logger.error(f"Error evaluating rule batch: {str(e)}")
+            return []
 
-    def _handle_trend_rule(self, conditions: List[Dict[str, Any]], data: Dict[str, Any]) -> bool:
+    def _numeric_conditions(self, rule: Dict[str, Any]) -> Optional[List[Tuple[tuple, int, Callable, Any]]]:
         """
-        处理趋势规则
+        提取规则中的数值比较条件
 
         Args:
-            conditions: 规则条件
-            data: 评估数据
+            rule: 规则对象
 
         Returns:
-            是否匹配
+            (参数路径, 操作符编码, 比较函数, 比较值) 列表；规则含非数值条件或子规则时返回 None
         """
-        try:
-            for condition in conditions:
-                parameter = condition['parameter']
-                operator = condition['operator']
-                value = condition['value']
-
-                # 获取数据中的参数值
-                param_value = self._get_parameter_value(parameter, data)
-                if param_value is None:
-                    return False
+        numeric_conditions = []
+        for condition in rule.get('conditions') or ():
+            if not isinstance(condition, dict) or 'conditions' in condition:
+                return None
 
-                # 评估条件
-                if not self._evaluate_condition(param_value, operator, value):
-                    return False
+            op_code = NUMERIC_OPERATOR_CODES.get(condition.get('operator'))
+            parameter = condition.get('parameter')
+            value = condition.get('value')
+            if op_code is None or not isinstance(parameter, str) or not _is_exact_number(value):
+                return None
 
-            return True
+            numeric_conditions.append((tuple(parameter.split('.')), op_code, OPERATORS[condition['operator']], value))
 
-        except Exception as e:
-            self.logger.error(f"Error handling trend rule: {str(e)}")
-            return False
+        return numeric_conditions
 
-    def _handle_composite_rule(self, conditions: List[Dict[str, Any]], data: Dict[str, Any]) -> bool:
+    def _get_enabled_rules(self) -> List[Tuple[Dict[str, Any], Callable[[Dict[str, Any]], bool]]]:
         """
-        处理组合规则
-
-        Args:
-            conditions: 规则条件
-            data: 评估数据
+        获取按优先级降序排列的启用规则及其求值函数，规则变更后才重新排序
 
         Returns:
-            是否匹配
+            (规则, 求值函数) 列表
         """
-        try:
-            # 组合规则需要所有条件都满足
-            for condition in conditions:
-                # 递归评估子条件
-                if isinstance(condition, dict) and 'conditions' in condition:
-                    if not self._evaluate_rule(condition, data):
-                        return False
-                else:
-                    parameter = condition['parameter']
-                    operator = condition['operator']
-                    value = condition['value']
-
-                    # 获取数据中的参数值
-                    param_value = self._get_parameter_value(parameter, data)
-                    if param_value is None:
-                        return False
-
-                    # 评估条件
-                    if not self._evaluate_condition(param_value, operator, value):
-                        return False
+        if self._rules_dirty:
+            # 先过滤再排序，禁用规则不参与排序
+            enabled_rules = [rule for rule in self.iter_rules() if rule.get('status') == 'enabled']
+            enabled_rules.sort(key=_priority_key)
+            self._enabled_rules = [
+                (rule, self._compiled_rules.get(rule.get('rule_id')) or self._compile_rule(rule))
+                for rule in enabled_rules
+            ]
+            self._rules_dirty = False
 
-            return True
-
-        except Exception as e:
-            self.logger.error(f"Error handling composite rule: {str(e)}")
-            return False
+        return self._enabled_rules
 
-    def _handle_anomaly_rule(self, conditions: List[Dict[str, Any]], data: Dict[str, Any]) -> bool:
+    def _validate_rule(self, rule: Dict[str, Any]) -> bool:
         """
-        处理异常规则
+        验证规则
 
         Args:
-            conditions: 规则条件
-            data: 评估数据
+            rule: 规则对象
 
         Returns:
-            是否匹配
+            是否有效
         """
         try:
-            for condition in conditions:
-                parameter = condition['parameter']
-                operator = condition['operator']
-                value = condition['value']
-
-                # 获取数据中的参数值
-                param_value = self._get_parameter_value(parameter, data)
-                if param_value is None:
+            # 检查必要字段
+            required_fields = ['name', 'description', 'type', 'conditions', 'actions']
+            for field in required_fields:
+                if field not in rule:
+                    self.logger.error("Missing required field %s in rule", field)
                     return False
 
-                # 评估条件
-                if not self._evaluate_condition(param_value, operator, value):
-                    return False
+            # 检查规则类型
+            rule_type = rule['type']
+            if rule_type not in self.RULE_TYPES:
+                self.logger.error("Invalid rule type: %s", rule_type)
+                return False
+
+            # 检查条件
+            conditions = rule['conditions']
+            if not isinstance(conditions, list) or not conditions:
+                self.logger.error("Invalid rule conditions")
+                return False
+
+            # 检查动作
+            actions = rule['actions']
+            if not isinstance(actions, list) or not actions:
+                self.logger.error("Invalid rule actions")
+                return False
+
+            # 检查优先级
+            if 'priority' in rule and not (1 <= rule['priority'] <= 10):
+                self.logger.error("Invalid rule priority")
+                return False
 
             return True
 
         except Exception as e:
-            self.logger.error(f"Error handling anomaly rule: {str(e)}")
+            self.logger.error(f"Error validating rule: {str(e)}")
             return False
 
-    def _handle_pattern_rule(self, conditions: List[Dict[str, Any]], data: Dict[str, Any]) -> bool:
+    def _compile_rule(self, rule: Dict[str, Any]) -> Callable[[Dict[str, Any]], bool]:
         """
-        处理模式规则
+        将规则预编译为求值函数
+
+        条件的操作符、参数路径和比较值在此处一次性解析，并生成一段内联了路径查找和比较的
+        Python 源码，经 compile()/exec() 得到单个求值函数，求值时不再经过逐条件的闭包调用。
+        组合规则的子规则同样是 AND 关系，因此用显式栈展开为一个扁平的条件列表，求值时不再递归。
+        无法求值的规则（类型或条件无效）编译为恒为 False 的函数，与逐条评估时的结果一致。
 
         Args:
-            conditions: 规则条件
-            data: 评估数据
+            rule: 规则对象
 
         Returns:
-            是否匹配
+            求值函数
         """
+        compiled = []
+        pending = [rule]
+        visited = set()
+        namespace = {'_cross_above': _cross_above, '_cross_below': _cross_below}
+
         try:
-            for condition in conditions:
-                parameter = condition['parameter']
-                operator = condition['operator']
-                value = condition['value']
-
-                # 获取数据中的参数值
-                param_value = self._get_parameter_value(parameter, data)
-                if param_value is None:
-                    return False
+            while pending:
+                current = pending.pop()
 
-                # 评估条件
-                if not self._evaluate_condition(param_value, operator, value):
-                    return False
+                # 同一子规则被多处引用时只需展开一次（AND 条件重复求值结果不变）
+                if id(current) in visited:
+                    continue
+                visited.add(id(current))
 
-            return True
+                rule_type = current['type']
+                if rule_type not in self.RULE_TYPES:
+                    return _never
 
-        except Exception as e:
-            self.logger.error(f"Error handling pattern rule: {str(e)}")
-            return False
+                composite = rule_type == 'composite'
+                for condition in current['conditions']:
+                    # 组合规则的子规则
+                    if composite and isinstance(condition, dict) and 'conditions' in condition:
+                        pending.append(condition)
+                        continue
 
-    def _get_parameter_value(self, parameter: str, data: Dict[str, Any]) -> Any:
-        """
-        获取参数值
+                    source = self._compile_condition(condition, len(compiled), namespace)
+                    if source is None:
+                        return _never
+                    compiled.append((OPERATOR_COSTS[condition['operator']], source))
 
-        Args:
-            parameter: 参数路径
-            data: 数据
+        except (KeyError, TypeError, AttributeError):
+            return _never
 
-        Returns:
-            参数值
-        """
-        try:
-            # 支持嵌套参数路径
-            if '.' in parameter:
-                parts = parameter.split('.')
-                value = data
-                for part in parts:
-                    if isinstance(value, dict) and part in value:
-                        value = value[part]
-                    else:
-                        return None
-                return value
-            else:
-                return data.get(parameter)
+        # 条件之间是 AND 关系，廉价且选择性高的条件先求值以便尽早短路
+        compiled.sort(key=operator.itemgetter(0))
+        lines = ['def evaluate(data):']
+        for _, source in compiled:
+            lines.extend(source)
+        lines.append('    return True')
 
-        except Exception as e:
-            self.logger.error(f"Error getting parameter value: {str(e)}")
-            return None
+        exec(compile('\n'.join(lines), f"<rule {rule.get('rule_id')}>", 'exec'), namespace)
+        return namespace['evaluate']
 
-    def _evaluate_condition(self, param_value: Any, operator: str, value: Any) -> bool:
+    def _compile_condition(self, condition: Dict[str, Any], index: int, namespace: Dict[str, Any]) -> Optional[List[str]]:
         """
-        评估条件
+        生成单个条件的求值代码
+
+        参数路径逐级展开为字典查找，路径不存在或值为 None 时条件不成立；比较值绑定到
+        命名空间中的 _v{index}，不写入源码。
 
         Args:
-            param_value: 参数值
-            operator: 操作符
-            value: 比较值
+            condition: 规则条件
+            index: 条件序号
+            namespace: 求值函数的全局命名空间
 
         Returns:
-            是否满足条件
+            源码行列表，操作符无效时返回 None
         """
-        try:
-            if operator == 'equals':
-                return param_value == value
-            elif operator == 'not_equals':
-                return param_value != value
-            elif operator == 'greater_than':
-                return param_value > value
-            elif operator == 'less_than':
-                return param_value < value
-            elif operator == 'greater_than_or_equal':
-                return param_value >= value
-            elif operator == 'less_than_or_equal':
-                return param_value <= value
-            elif operator == 'contains':
-                return value in param_value
-            elif operator == 'not_contains':
-                return value not in param_value
-            elif operator == 'cross_above':
-                # 用于趋势交叉
-                if isinstance(param_value, list) and len(param_value) >= 2:
-                    return param_value[-1] > value and param_value[-2] <= value
-                return False
-            elif operator == 'cross_below':
-                # 用于趋势交叉
-                if isinstance(param_value, list) and len(param_value) >= 2:
-                    return param_value[-1] < value and param_value[-2] >= value
-                return False
-            else:
-                self.logger.error(f"Invalid operator: {operator}")
-                return False
+        expression = OPERATOR_EXPRESSIONS.get(condition['operator'])
+        if expression is None:
+            return None
 
-        except Exception as e:
-            self.logger.error(f"Error evaluating condition: {str(e)}")
-            return False
+        path = condition['parameter'].split('.')
+        value_name = f"_v{index}"
+        namespace[value_name] = condition['value']
+
+        lines = ['    p = data']
+        for part in path:
+            lines.append(f"    if not isinstance(p, dict) or {part!r} not in p: return False")
+            lines.append(f"    p = p[{part!r}]")
+        lines.append(f"    if p is None or not ({expression.format(p='p', v=value_name)}): return False")
+
+        return lines
+
+    def close(self):
+        """
+        关闭并行评估线程池（未启用并行时无操作）
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
 
     def load_rules(self, rules: List[Dict[str, Any]]) -> int:
         """
@@ -523,9 +696,10 @@ class RuleEngine:
         Returns:
             成功加载的规则数量
         """
+        now = datetime.now().isoformat()
         count = 0
         for rule in rules:
-            if self.add_rule(rule):
+            if self._add_rule(rule, now):
                 count += 1
         return count
 
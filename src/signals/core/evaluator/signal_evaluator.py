@@ -1,8 +1,78 @@
 # Signal Evaluator
 
 import logging
+import numbers
+from bisect import bisect_right
+from collections import Counter
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from operator import itemgetter
+from typing import Dict, List, Optional, Any, Tuple
+
+# 尝试导入数值计算库，用于批量评估
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+# 评估等级，按分数从低到高排列；分数不低于第 i 个阈值即进入第 i + 1 级
+EVALUATION_LEVELS = ('very_poor', 'poor', 'fair', 'good', 'very_good', 'excellent')
+LEVEL_THRESHOLDS = (0.3, 0.45, 0.6, 0.75, 0.9)
+
+# (信号类型, 市场趋势) -> 趋势一致性分数，未列出的组合为 0.5
+TREND_CONSISTENCY = {
+    ('buy', 'up'): 0.9,
+    ('sell', 'down'): 0.9,
+    ('buy', 'down'): 0.3,
+    ('sell', 'up'): 0.3
+}
+
+# 评估等级 -> (推荐动作, 置信度系数, 置信度边界函数, 边界值)，推荐置信度为 边界函数(边界值, 综合分数 * 系数)
+RECOMMENDATION_POLICIES = {
+    'excellent': ('strongly_recommended', 1.1, min, 1.0),
+    'very_good': ('strongly_recommended', 1.1, min, 1.0),
+    'good': ('recommended', 1, None, None),
+    'fair': ('cautiously_recommended', 0.9, max, 0.5),
+    'poor': ('not_recommended', 1, min, 0.5),
+    'very_poor': ('not_recommended', 1, min, 0.5)
+}
+
+# 评估等级 -> 推荐理由模板，第一条按信号类型格式化
+_STRONG_REASONS = ("Strong {signal_type} signal with high confidence", "Multiple indicators confirm the signal")
+_WEAK_REASONS = ("Weak {signal_type} signal with low confidence", "Few indicators support the signal")
+REASON_TEMPLATES = {
+    'excellent': _STRONG_REASONS,
+    'very_good': _STRONG_REASONS,
+    'good': ("Decent {signal_type} signal with reasonable confidence", "Most indicators support the signal"),
+    'fair': ("Mixed signals for {signal_type} action", "Some indicators support the signal, but not all"),
+    'poor': _WEAK_REASONS,
+    'very_poor': _WEAK_REASONS
+}
+
+# 统计时按列取出的信号字段
+_get_strength = itemgetter('strength')
+_get_confidence = itemgetter('confidence')
+_get_type = itemgetter('type')
+
+# 异常风险 -> 分数，未知风险按 0.5 计
+ANOMALY_RISK_SCORES = {
+    'low': 0.3,
+    'medium': 0.6,
+    'high': 0.9
+}
+
+def _clamp_unit(value: float) -> float:
+    """
+    将分数限制在 [0, 1] 区间内
+
+    Args:
+        value: 原始分数
+
+    Returns:
+        限制后的分数
+    """
+    return min(max(value, 0.0), 1.0)
 
 class SignalEvaluator:
     """
@@ -10,6 +80,9 @@ class SignalEvaluator:
     评估信号的可靠性和质量
     """
 
+    # 信号必要字段
+    REQUIRED_FIELDS = frozenset({'signal_id', 'asset', 'type', 'strength', 'confidence', 'timestamp'})
+
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         """
         初始化信号评估器
@@ -26,13 +99,22 @@ class SignalEvaluator:
         self.weight_ai_analysis = self.config.get('weight_ai_analysis', 0.2)
         self.weight_market_context = self.config.get('weight_market_context', 0.1)
 
-    def evaluate_signal(self, signal: Dict[str, Any], historical_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        # 信号数量达到该值时按列批量计算分数
+        self.batch_min_signals = self.config.get('batch_min_signals', 64)
+
+    def evaluate_signal(self,
+                        signal: Dict[str, Any],
+                        historical_data: Optional[Dict[str, Any]] = None,
+                        timestamp: Optional[str] = None,
+                        min_score: Optional[float] = None) -> Dict[str, Any]:
         """
         评估信号
 
         Args:
             signal: 信号对象
             historical_data: 历史数据
+            timestamp: 评估时间（ISO 格式），为空时取当前时间；批量评估时整批共用一个
+            min_score: 最低综合分数，低于该分数时返回 None
 
         Returns:
             评估结果
@@ -43,9 +125,14 @@ class SignalEvaluator:
                 self.logger.error("Invalid signal for evaluation")
                 return None
 
-            # 计算各维度评估分数
-            strength_score = self._evaluate_strength(signal)
-            confidence_score = self._evaluate_confidence(signal)
+            # 计算各维度评估分数：强度 (1-10) 映射到 (0-1)，置信度已经是 (0-1) 范围
+            strength_score = signal['strength'] / 10.0
+            confidence_score = signal['confidence']
+
+            # AI 分析和市场背景取满分也达不到最低分数时，不再计算这两个维度
+            if min_score is not None and self._score_upper_bound(strength_score, confidence_score) < min_score:
+                return None
+
             ai_analysis_score = self._evaluate_ai_analysis(signal)
             market_context_score = self._evaluate_market_context(signal, historical_data)
 
@@ -57,31 +144,19 @@ class SignalEvaluator:
                 market_context_score * self.weight_market_context
             )
 
+            if min_score is not None and not overall_score >= min_score:
+                return None
+
             # 确定评估等级
             evaluation_level = self._get_evaluation_level(overall_score)
 
-            # 生成评估结果
-            evaluation = {
-                'signal_id': signal['signal_id'],
-                'overall_score': overall_score,
-                'evaluation_level': evaluation_level,
-                'dimension_scores': {
-                    'strength': strength_score,
-                    'confidence': confidence_score,
-                    'ai_analysis': ai_analysis_score,
-                    'market_context': market_context_score
-                },
-                'weights': {
-                    'strength': self.weight_strength,
-                    'confidence': self.weight_confidence,
-                    'ai_analysis': self.weight_ai_analysis,
-                    'market_context': self.weight_market_context
-                },
-                'timestamp': datetime.now().isoformat(),
-                'recommendation': self._generate_recommendation(signal, evaluation_level, overall_score)
-            }
+            evaluation = self._build_evaluation(
+                signal, overall_score, evaluation_level,
+                strength_score, confidence_score, ai_analysis_score, market_context_score,
+                timestamp or datetime.now().isoformat()
+            )
 
-            self.logger.info(f"Evaluated signal {signal['signal_id']}: {evaluation_level} (score: {overall_score:.2f})")
+            self.logger.info("Evaluated signal %s: %s (score: %.2f)", signal['signal_id'], evaluation_level, overall_score)
 
             return evaluation
 
@@ -89,23 +164,263 @@ class SignalEvaluator:
             self.logger.error(f"Error evaluating signal: {str(e)}")
             return None
 
-    def evaluate_multiple_signals(self, signals: List[Dict[str, Any]], historical_data: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    def _score_upper_bound(self, strength_score: float, confidence_score: float) -> float:
+        """
+        计算综合分数的上限（AI 分析和市场背景维度按满分 1 计，其输入均已限制在 [0, 1] 内）
+
+        Args:
+            strength_score: 强度评估分数
+            confidence_score: 置信度评估分数
+
+        Returns:
+            综合分数上限
+        """
+        return (
+            strength_score * self.weight_strength +
+            confidence_score * self.weight_confidence +
+            max(self.weight_ai_analysis, 0) +
+            max(self.weight_market_context, 0)
+        )
+
+    def _build_evaluation(self,
+                          signal: Dict[str, Any],
+                          overall_score: float,
+                          evaluation_level: str,
+                          strength_score: float,
+                          confidence_score: float,
+                          ai_analysis_score: float,
+                          market_context_score: float,
+                          timestamp: str) -> Dict[str, Any]:
+        """
+        生成评估结果
+
+        Args:
+            signal: 信号对象
+            overall_score: 综合分数
+            evaluation_level: 评估等级
+            strength_score: 强度评估分数
+            confidence_score: 置信度评估分数
+            ai_analysis_score: AI 分析评估分数
+            market_context_score: 市场背景评估分数
+            timestamp: 评估时间
+
+        Returns:
+            评估结果
+        """
+        return {
+            'signal_id': signal['signal_id'],
+            'overall_score': overall_score,
+            'evaluation_level': evaluation_level,
+            'dimension_scores': {
+                'strength': strength_score,
+                'confidence': confidence_score,
+                'ai_analysis': ai_analysis_score,
+                'market_context': market_context_score
+            },
+            'weights': {
+                'strength': self.weight_strength,
+                'confidence': self.weight_confidence,
+                'ai_analysis': self.weight_ai_analysis,
+                'market_context': self.weight_market_context
+            },
+            'timestamp': timestamp,
+            'recommendation': self._generate_recommendation(signal, evaluation_level, overall_score)
+        }
+
+    def evaluate_multiple_signals(self,
+                                  signals: List[Dict[str, Any]],
+                                  historical_data: Optional[Dict[str, Any]] = None,
+                                  min_score: Optional[float] = None) -> List[Dict[str, Any]]:
         """
         评估多个信号
 
         Args:
             signals: 信号列表
             historical_data: 历史数据
+            min_score: 最低综合分数，只返回不低于该分数的评估结果；
+                       明显达不到的信号会跳过 AI 分析和市场背景的计算
 
         Returns:
             评估结果列表
         """
-        evaluations = []
+        return [evaluation for _, evaluation in self._evaluate_pairs(signals, historical_data, min_score)]
+
+    def _evaluate_pairs(self,
+                        signals: List[Dict[str, Any]],
+                        historical_data: Optional[Dict[str, Any]] = None,
+                        min_score: Optional[float] = None) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        评估多个信号，保留信号与评估结果的对应关系
+
+        Args:
+            signals: 信号列表
+            historical_data: 历史数据
+            min_score: 最低综合分数
+
+        Returns:
+            (信号, 评估结果) 列表，无效信号和低于最低分数的信号被跳过
+        """
+        if NUMPY_AVAILABLE and len(signals) >= self.batch_min_signals:
+            return self._evaluate_batch(signals, historical_data, min_score)
+
+        now = datetime.now().isoformat()
+        pairs = []
         for signal in signals:
-            evaluation = self.evaluate_signal(signal, historical_data)
+            evaluation = self.evaluate_signal(signal, historical_data, now, min_score)
             if evaluation:
-                evaluations.append(evaluation)
-        return evaluations
+                pairs.append((signal, evaluation))
+        return pairs
+
+    def _evaluate_batch(self,
+                        signals: List[Dict[str, Any]],
+                        historical_data: Optional[Dict[str, Any]] = None,
+                        min_score: Optional[float] = None) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        按列批量评估信号
+
+        先一次遍历把各维度的原始数值提取为数组，再用向量运算计算分数和等级，最后才生成评估结果字典。
+        运算顺序与 evaluate_signal 相同，结果逐位一致。
+
+        Args:
+            signals: 信号列表
+            historical_data: 历史数据
+            min_score: 最低综合分数
+
+        Returns:
+            (信号, 评估结果) 列表
+        """
+        try:
+            valid_signals = []
+            for signal in signals:
+                if not self._validate_signal(signal):
+                    self.logger.error("Invalid signal for evaluation")
+                elif min_score is None or self._score_upper_bound(signal['strength'] / 10.0, signal['confidence']) >= min_score:
+                    valid_signals.append(signal)
+
+            if not valid_signals:
+                return []
+
+            # 提取数值列并按列计算分数
+            columns = self._extract_soa(valid_signals, historical_data)
+            strength_scores, ai_scores, market_scores, overall_scores, level_codes = self._score_columns(columns)
+
+            # 生成评估结果；置信度维度分数直接取信号中的原值，整批共用一个评估时间
+            now = datetime.now().isoformat()
+            pairs = [
+                (signal, self._build_evaluation(
+                    signal, overall_score, EVALUATION_LEVELS[level_code],
+                    strength_score, signal['confidence'], ai_score, market_score, now
+                ))
+                for signal, overall_score, level_code, strength_score, ai_score, market_score in zip(
+                    valid_signals,
+                    overall_scores.tolist(),
+                    level_codes.tolist(),
+                    strength_scores.tolist(),
+                    ai_scores.tolist(),
+                    market_scores.tolist()
+                )
+                if min_score is None or overall_score >= min_score
+            ]
+
+            # 日志级别整批只检查一次
+            if self.logger.isEnabledFor(logging.INFO):
+                for signal, evaluation in pairs:
+                    self.logger.info(
+                        "Evaluated signal %s: %s (score: %.2f)",
+                        signal['signal_id'], evaluation['evaluation_level'], evaluation['overall_score']
+                    )
+
+            return pairs
+
+        except Exception as e:
+            self.logger.error(f"Error evaluating signal batch: {str(e)}")
+            return []
+
+    def _score_columns(self, columns: Dict[str, Any]) -> Tuple[Any, Any, Any, Any, Any]:
+        """
+        按列计算各维度分数、综合分数和等级编码
+
+        Args:
+            columns: _extract_soa 提取的数值列
+
+        Returns:
+            (强度分数, AI 分析分数, 市场背景分数, 综合分数, 等级编码) 数组
+        """
+        # 各维度分数
+        strength_scores = columns['strength'] / 10.0
+        ai_counts = columns['ai_count']
+        ai_scores = np.where(ai_counts > 0, columns['ai_sum'] / np.maximum(ai_counts, 1), 0.5)
+
+        # 与 max(0.1, min(0.9, x)) 逐元素一致（包括 NaN 的处理）
+        volatility_scores = 1 - columns['volatility'] * 10
+        volatility_scores = np.where(volatility_scores < 0.9, volatility_scores, 0.9)
+        volatility_scores = np.where(volatility_scores > 0.1, volatility_scores, 0.1)
+        market_scores = np.where(
+            columns['has_market'],
+            (columns['trend_consistency'] + volatility_scores + columns['liquidity']) / 3,
+            0.5
+        )
+
+        # 综合分数与等级
+        overall_scores = (
+            strength_scores * self.weight_strength +
+            columns['confidence'] * self.weight_confidence +
+            ai_scores * self.weight_ai_analysis +
+            market_scores * self.weight_market_context
+        )
+        level_codes = np.searchsorted(LEVEL_THRESHOLDS, overall_scores, side='right')
+        level_codes[np.isnan(overall_scores)] = 0
+
+        return strength_scores, ai_scores, market_scores, overall_scores, level_codes
+
+    def _extract_soa(self, signals: List[Dict[str, Any]], historical_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        一次遍历提取批量评分所需的数值列
+
+        Args:
+            signals: 已验证的信号列表
+            historical_data: 历史数据
+
+        Returns:
+            列名 -> 数组
+        """
+        strengths = []
+        confidences = []
+        ai_sums = []
+        ai_counts = []
+        has_market = []
+        trend_consistencies = []
+        volatilities = []
+        liquidities = []
+
+        for signal in signals:
+            strengths.append(signal['strength'])
+            confidences.append(signal['confidence'])
+
+            ai_sum, ai_count = self._ai_analysis_components(signal)
+            ai_sums.append(ai_sum)
+            ai_counts.append(ai_count)
+
+            market = self._market_context_components(signal, historical_data)
+            if market is None:
+                has_market.append(False)
+                market = (0.5, 0.0, 0.5)
+            else:
+                has_market.append(True)
+            trend_consistencies.append(market[0])
+            volatilities.append(market[1])
+            liquidities.append(market[2])
+
+        return {
+            'strength': np.array(strengths, dtype=np.float64),
+            'confidence': np.array(confidences, dtype=np.float64),
+            'ai_sum': np.array(ai_sums, dtype=np.float64),
+            'ai_count': np.array(ai_counts, dtype=np.float64),
+            'has_market': np.array(has_market, dtype=bool),
+            'trend_consistency': np.array(trend_consistencies, dtype=np.float64),
+            'volatility': np.array(volatilities, dtype=np.float64),
+            'liquidity': np.array(liquidities, dtype=np.float64)
+        }
 
     def _validate_signal(self, signal: Dict[str, Any]) -> bool:
         """
@@ -119,20 +434,19 @@ class SignalEvaluator:
         """
         try:
             # 检查必要字段
-            required_fields = ['signal_id', 'asset', 'type', 'strength', 'confidence', 'timestamp']
-            for field in required_fields:
-                if field not in signal:
-                    self.logger.error(f"Missing required field {field} in signal")
-                    return False
+            missing_fields = self.REQUIRED_FIELDS - signal.keys()
+            if missing_fields:
+                self.logger.error("Missing required fields %s in signal", sorted(missing_fields))
+                return False
 
             # 检查信号强度
             if not 1 <= signal['strength'] <= 10:
-                self.logger.error(f"Invalid signal strength: {signal['strength']}")
+                self.logger.error("Invalid signal strength: %s", signal['strength'])
                 return False
 
             # 检查信号置信度
             if not 0 <= signal['confidence'] <= 1:
-                self.logger.error(f"Invalid signal confidence: {signal['confidence']}")
+                self.logger.error("Invalid signal confidence: %s", signal['confidence'])
                 return False
 
             return True
@@ -141,60 +455,40 @@ class SignalEvaluator:
             self.logger.error(f"Error validating signal: {str(e)}")
             return False
 
-    def _evaluate_strength(self, signal: Dict[str, Any]) -> float:
-        """
-        评估信号强度
-
-        Args:
-            signal: 信号对象
-
-        Returns:
-            强度评估分数 (0-1)
-        """
-        try:
-            strength = signal['strength']
-            # 将强度 (1-10) 映射到 (0-1)
-            return strength / 10.0
-
-        except Exception as e:
-            self.logger.error(f"Error evaluating strength: {str(e)}")
-            return 0.5
-
-    def _evaluate_confidence(self, signal: Dict[str, Any]) -> float:
+    def _evaluate_ai_analysis(self, signal: Dict[str, Any]) -> float:
         """
-        评估信号置信度
+        评估 AI 分析质量
 
         Args:
             signal: 信号对象
 
         Returns:
-            置信度评估分数 (0-1)
+            AI 分析评估分数 (0-1)
         """
-        try:
-            confidence = signal['confidence']
-            # 置信度已经是 (0-1) 范围
-            return confidence
+        score_sum, analysis_dimensions = self._ai_analysis_components(signal)
 
-        except Exception as e:
-            self.logger.error(f"Error evaluating confidence: {str(e)}")
+        # 计算平均分数
+        if analysis_dimensions > 0:
+            return score_sum / analysis_dimensions
+        else:
             return 0.5
 
-    def _evaluate_ai_analysis(self, signal: Dict[str, Any]) -> float:
+    def _ai_analysis_components(self, signal: Dict[str, Any]) -> Tuple[float, int]:
         """
-        评估 AI 分析质量
+        汇总 AI 分析各维度的分数
 
         Args:
             signal: 信号对象
 
         Returns:
-            AI 分析评估分数 (0-1)
+            (分数之和, 覆盖的维度数)；无 AI 分析或解析出错时为 (0, 0)
         """
         try:
             ai_analysis = signal.get('ai_analysis', {})
             if not ai_analysis:
-                return 0.5
+                return 0, 0
 
-            # 计算 AI 分析覆盖的维度
+            # 计算 AI 分析覆盖的维度（各维度置信度限制在 [0, 1] 内）
             analysis_dimensions = 0
             score_sum = 0
 
@@ -202,14 +496,14 @@ class SignalEvaluator:
             if 'sentiment_analysis' in ai_analysis:
                 sentiment_analysis = ai_analysis['sentiment_analysis']
                 if 'confidence' in sentiment_analysis:
-                    score_sum += sentiment_analysis['confidence']
+                    score_sum += _clamp_unit(sentiment_analysis['confidence'])
                     analysis_dimensions += 1
 
             # 评估价格预测
             if 'price_prediction' in ai_analysis:
                 price_prediction = ai_analysis['price_prediction']
                 if 'confidence' in price_prediction:
-                    score_sum += price_prediction['confidence']
+                    score_sum += _clamp_unit(price_prediction['confidence'])
                     analysis_dimensions += 1
 
             # 评估异常检测
@@ -217,23 +511,14 @@ class SignalEvaluator:
                 anomaly_detection = ai_analysis['anomaly_detection']
                 if 'anomaly_risk' in anomaly_detection:
                     # 将异常风险映射到分数
-                    risk_score = {
-                        'low': 0.3,
-                        'medium': 0.6,
-                        'high': 0.9
-                    }.get(anomaly_detection['anomaly_risk'], 0.5)
-                    score_sum += risk_score
+                    score_sum += ANOMALY_RISK_SCORES.get(anomaly_detection['anomaly_risk'], 0.5)
                     analysis_dimensions += 1
 
-            # 计算平均分数
-            if analysis_dimensions > 0:
-                return score_sum / analysis_dimensions
-            else:
-                return 0.5
+            return score_sum, analysis_dimensions
 
         except Exception as e:
             self.logger.error(f"Error evaluating AI analysis: {str(e)}")
-            return 0.5
+            return 0, 0
 
     def _evaluate_market_context(self, signal: Dict[str, Any], historical_data: Optional[Dict[str, Any]]) -> float:
         """
@@ -246,48 +531,61 @@ class SignalEvaluator:
         Returns:
             市场背景评估分数 (0-1)
         """
+        components = self._market_context_components(signal, historical_data)
+        if components is None:
+            return 0.5
+
+        trend_consistency, volatility, liquidity = components
+
+        # 评估市场 volatility
+        volatility_score = max(0.1, min(0.9, 1 - volatility * 10))
+
+        # 评估市场流动性
+        liquidity_score = liquidity
+
+        # 计算市场背景综合分数
+        return (trend_consistency + volatility_score + liquidity_score) / 3
+
+    def _market_context_components(self, signal: Dict[str, Any], historical_data: Optional[Dict[str, Any]]) -> Optional[Tuple[float, float, float]]:
+        """
+        提取市场背景评估所需的数值
+
+        Args:
+            signal: 信号对象
+            historical_data: 历史数据
+
+        Returns:
+            (趋势一致性, 波动率, 流动性)；无可用历史数据或解析出错时返回 None
+        """
         try:
             if not historical_data:
-                return 0.5
+                return None
 
             asset = signal['asset']
             signal_type = signal['type']
 
             # 检查资产历史数据
             if asset not in historical_data:
-                return 0.5
+                return None
 
             asset_data = historical_data[asset]
 
             # 评估市场趋势与信号的一致性
             market_trend = asset_data.get('market_trend', 'neutral')
-            trend_consistency = 0.5
-
-            if signal_type == 'buy' and market_trend == 'up':
-                trend_consistency = 0.9
-            elif signal_type == 'sell' and market_trend == 'down':
-                trend_consistency = 0.9
-            elif signal_type == 'buy' and market_trend == 'down':
-                trend_consistency = 0.3
-            elif signal_type == 'sell' and market_trend == 'up':
-                trend_consistency = 0.3
-
-            # 评估市场 volatility
-            volatility = asset_data.get('volatility', 0.02)
-            volatility_score = max(0.1, min(0.9, 1 - volatility * 10))
+            trend_consistency = TREND_CONSISTENCY.get((signal_type, market_trend), 0.5)
 
-            # 评估市场流动性
+            # 非数值的波动率或流动性与原逻辑一致，整体按默认市场背景分数处理（不做字符串等类型转换）
+            volatility = asset_data.get('volatility', 0.02)
             liquidity = asset_data.get('liquidity', 0.5)
-            liquidity_score = liquidity
-
-            # 计算市场背景综合分数
-            market_context_score = (trend_consistency + volatility_score + liquidity_score) / 3
+            if not isinstance(volatility, numbers.Real) or not isinstance(liquidity, numbers.Real):
+                return None
 
-            return market_context_score
+            # 流动性直接作为分数使用，限制在 [0, 1] 内以保证 min_score 预剪枝的上限成立
+            return trend_consistency, float(volatility), _clamp_unit(float(liquidity))
 
         except Exception as e:
             self.logger.error(f"Error evaluating market context: {str(e)}")
-            return 0.5
+            return None
 
     def _get_evaluation_level(self, score: float) -> str:
         """
@@ -299,18 +597,10 @@ class SignalEvaluator:
         Returns:
             评估等级
         """
-        if score >= 0.9:
-            return 'excellent'
-        elif score >= 0.75:
-            return 'very_good'
-        elif score >= 0.6:
-            return 'good'
-        elif score >= 0.45:
-            return 'fair'
-        elif score >= 0.3:
-            return 'poor'
-        else:
-            return 'very_poor'
+        # NaN 与任何阈值比较都不成立，归为最低等级
+        if score != score:
+            return EVALUATION_LEVELS[0]
+        return EVALUATION_LEVELS[bisect_right(LEVEL_THRESHOLDS, score)]
 
     def _generate_recommendation(self, signal: Dict[str, Any], evaluation_level: str, overall_score: float) -> Dict[str, Any]:
         """
@@ -327,33 +617,14 @@ class SignalEvaluator:
         signal_type = signal['type']
 
         # 基于评估等级生成推荐
-        if evaluation_level in ['excellent', 'very_good']:
-            action = 'strongly_recommended'
-            confidence = min(1.0, overall_score * 1.1)
-        elif evaluation_level == 'good':
-            action = 'recommended'
-            confidence = overall_score
-        elif evaluation_level == 'fair':
-            action = 'cautiously_recommended'
-            confidence = max(0.5, overall_score * 0.9)
-        else:
-            action = 'not_recommended'
-            confidence = min(0.5, overall_score)
+        action, factor, bound, limit = RECOMMENDATION_POLICIES.get(evaluation_level, RECOMMENDATION_POLICIES['very_poor'])
+        confidence = overall_score * factor
+        if bound is not None:
+            confidence = bound(limit, confidence)
 
         # 生成推荐理由
-        reasons = []
-        if evaluation_level in ['excellent', 'very_good']:
-            reasons.append(f"Strong {signal_type} signal with high confidence")
-            reasons.append("Multiple indicators confirm the signal")
-        elif evaluation_level == 'good':
-            reasons.append(f"Decent {signal_type} signal with reasonable confidence")
-            reasons.append("Most indicators support the signal")
-        elif evaluation_level == 'fair':
-            reasons.append(f"Mixed signals for {signal_type} action")
-            reasons.append("Some indicators support the signal, but not all")
-        else:
-            reasons.append(f"Weak {signal_type} signal with low confidence")
-            reasons.append("Few indicators support the signal")
+        summary, detail = REASON_TEMPLATES.get(evaluation_level, _WEAK_REASONS)
+        reasons = [summary.format(signal_type=signal_type), detail]
 
         return {
             'action': action,
@@ -363,33 +634,39 @@ class SignalEvaluator:
             'evaluation_level': evaluation_level
         }
 
-    def compare_signals(self, signals: List[Dict[str, Any]], historical_data: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    def compare_signals(self, signals: List[Dict[str, Any]], historical_data: Optional[Dict[str, Any]] = None, inplace: bool = False) -> List[Dict[str, Any]]:
         """
         比较多个信号
 
         Args:
             signals: 信号列表
             historical_data: 历史数据
+            inplace: 是否直接在原信号上写入评估结果（不复制信号）
 
         Returns:
             排序后的信号列表
         """
         try:
-            # 评估每个信号
-            evaluated_signals = []
-            for signal in signals:
-                evaluation = self.evaluate_signal(signal, historical_data)
-                if evaluation:
-                    signal_with_evaluation = signal.copy()
-                    signal_with_evaluation['evaluation'] = evaluation
-                    evaluated_signals.append(signal_with_evaluation)
-
-            # 按综合评估分数排序
-            sorted_signals = sorted(
-                evaluated_signals,
-                key=lambda x: x['evaluation']['overall_score'],
-                reverse=True
-            )
+            # 评估每个信号（每个信号只评估一次）
+            pairs = self._evaluate_pairs(signals, historical_data)
+
+            # 按综合评估分数降序排序，分数相同时保持原有顺序
+            if NUMPY_AVAILABLE:
+                scores = np.fromiter(
+                    (evaluation['overall_score'] for _, evaluation in pairs),
+                    dtype=np.float64,
+                    count=len(pairs)
+                )
+                pairs = [pairs[i] for i in np.argsort(-scores, kind='stable').tolist()]
+            else:
+                pairs.sort(key=lambda pair: pair[1]['overall_score'], reverse=True)
+
+            # 只在输出时合并信号和评估结果
+            sorted_signals = []
+            for signal, evaluation in pairs:
+                signal_with_evaluation = signal if inplace else signal.copy()
+                signal_with_evaluation['evaluation'] = evaluation
+                sorted_signals.append(signal_with_evaluation)
 
             return sorted_signals
 
@@ -397,6 +674,24 @@ class SignalEvaluator:
             self.logger.error(f"Error comparing signals: {str(e)}")
             return []
 
+    def _count_at_least(self, values: List[Any], upper: float, lower: float) -> Tuple[int, int]:
+        """
+        统计不低于两个阈值的值的个数
+
+        Args:
+            values: 数值列表
+            upper: 较高阈值
+            lower: 较低阈值
+
+        Returns:
+            (不低于 upper 的个数, 不低于 lower 的个数)
+        """
+        if NUMPY_AVAILABLE:
+            column = np.array(values, dtype=np.float64)
+            return int(np.count_nonzero(column >= upper)), int(np.count_nonzero(column >= lower))
+
+        return sum(1 for value in values if value >= upper), sum(1 for value in values if value >= lower)
+
     def get_signal_statistics(self, signals: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         获取信号统计信息
@@ -418,48 +713,31 @@ class SignalEvaluator:
                     'confidence_distribution': {}
                 }
 
-            # 计算基本统计
+            # 一次取出强度和置信度列，求和与分布都在列上完成
             total_signals = len(signals)
-            average_strength = sum(s['strength'] for s in signals) / total_signals
-            average_confidence = sum(s['confidence'] for s in signals) / total_signals
+            strengths = list(map(_get_strength, signals))
+            confidences = list(map(_get_confidence, signals))
+            average_strength = sum(strengths) / total_signals
+            average_confidence = sum(confidences) / total_signals
 
             # 计算信号类型分布
-            signal_type_distribution = {}
-            for signal in signals:
-                signal_type = signal['type']
-                if signal_type not in signal_type_distribution:
-                    signal_type_distribution[signal_type] = 0
-                signal_type_distribution[signal_type] += 1
+            signal_type_distribution = dict(Counter(map(_get_type, signals)))
 
-            # 计算强度分布
+            # 计算强度分布：high 8-10，medium 4-7，low 1-3
+            strength_high, strength_medium = self._count_at_least(strengths, 8, 4)
             strength_distribution = {
-                'high': 0,  # 8-10
-                'medium': 0,  # 4-7
-                'low': 0  # 1-3
+                'high': strength_high,
+                'medium': strength_medium - strength_high,
+                'low': total_signals - strength_medium
             }
-            for signal in signals:
-                strength = signal['strength']
-                if strength >= 8:
-                    strength_distribution['high'] += 1
-                elif strength >= 4:
-                    strength_distribution['medium'] += 1
-                else:
-                    strength_distribution['low'] += 1
-
-            # 计算置信度分布
+
+            # 计算置信度分布：high 0.8-1.0，medium 0.5-0.79，low 0.0-0.49
+            confidence_high, confidence_medium = self._count_at_least(confidences, 0.8, 0.5)
             confidence_distribution = {
-                'high': 0,  # 0.8-1.0
-                'medium': 0,  # 0.5-0.79
-                'low': 0  # 0.0-0.49
+                'high': confidence_high,
+                'medium': confidence_medium - confidence_high,
+                'low': total_signals - confidence_medium
             }
-            for signal in signals:
-                confidence = signal['confidence']
-                if confidence >= 0.8:
-                    confidence_distribution['high'] += 1
-                elif confidence >= 0.5:
-                    confidence_distribution['medium'] += 1
-                else:
-                    confidence_distribution['low'] += 1
 
             return {
                 'total_signals': total_signals,
@@ -1,9 +1,22 @@
 # Signal Generator
 
+import itertools
 import logging
-import uuid
-from datetime import datetime
-from typing import Dict, List, Optional, Any
+import secrets
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any, Tuple
+
+# 信号 ID = 进程级随机前缀 + 递增计数器，同一进程内不会重复，生成时无需系统调用
+_SIGNAL_PREFIX = secrets.token_hex(4)
+_signal_counter = itertools.count()
+
+# 信号类型 -> 描述模板，只格式化命中的那一条
+DESCRIPTION_TEMPLATES = {
+    'buy': "Strong {level} buy signal for {asset} with strength {strength}/10 and confidence {confidence:.2f}",
+    'sell': "Strong {level} sell signal for {asset} with strength {strength}/10 and confidence {confidence:.2f}",
+    'hold': "Neutral hold signal for {asset} with strength {strength}/10 and confidence {confidence:.2f}",
+    'alert': "{level} alert signal for {asset} with strength {strength}/10 and confidence {confidence:.2f}"
+}
 
 class SignalGenerator:
     """
@@ -11,6 +24,9 @@ class SignalGenerator:
     基于 AI 模型分析结果和市场数据生成信号
     """
 
+    # 信号必要字段
+    REQUIRED_FIELDS = frozenset({'signal_id', 'asset', 'type', 'strength', 'confidence', 'timestamp'})
+
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         """
         初始化信号生成器
@@ -25,6 +41,13 @@ class SignalGenerator:
         self.min_confidence = self.config.get('min_confidence', 0.5)
         self.signal_expiry_hours = self.config.get('signal_expiry_hours', 24)
 
+        # AI 分析结果字段 -> 信号生成方法，按顺序处理
+        self._ai_handlers = (
+            ('sentiment_analysis', self._generate_from_sentiment),
+            ('price_prediction', self._generate_from_price_prediction),
+            ('anomaly_detection', self._generate_from_anomaly_detection)
+        )
+
     def generate_signal(self,
                       asset: str,
                       signal_type: str,
@@ -32,7 +55,8 @@ class SignalGenerator:
                       confidence: float,
                       trigger_conditions: Dict[str, Any],
                       ai_analysis: Optional[Dict[str, Any]] = None,
-                      market_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+                      market_data: Optional[Dict[str, Any]] = None,
+                      timestamp: Optional[datetime] = None) -> Dict[str, Any]:
         """
         生成信号
 
@@ -44,6 +68,7 @@ class SignalGenerator:
             trigger_conditions: 触发条件
             ai_analysis: AI 模型分析结果
             market_data: 市场数据
+            timestamp: 信号生成时间，为空时取当前时间；批量生成时整批共用一个
 
         Returns:
             信号对象
@@ -58,15 +83,15 @@ class SignalGenerator:
 
             # 检查最小置信度
             if confidence < self.min_confidence:
-                self.logger.warning(f"Signal confidence {confidence} below threshold {self.min_confidence}, skipping signal generation")
+                self.logger.warning("Signal confidence %s below threshold %s, skipping signal generation", confidence, self.min_confidence)
                 return None
 
             # 生成信号 ID
-            signal_id = f"signal_{uuid.uuid4().hex[:8]}"
+            signal_id = f"signal_{_SIGNAL_PREFIX}{next(_signal_counter):08x}"
 
             # 计算信号有效期
-            timestamp = datetime.now()
-            expiry_time = timestamp
+            timestamp = timestamp or datetime.now()
+            expiry_time = timestamp + timedelta(hours=self.signal_expiry_hours)
 
             # 构建信号对象
             signal = {
@@ -93,7 +118,7 @@ class SignalGenerator:
             # 生成信号描述
             signal['description'] = self._generate_signal_description(signal)
 
-            self.logger.info(f"Generated {signal_type} signal for {asset} with strength {strength} and confidence {confidence}")
+            self.logger.info("Generated %s signal for %s with strength %s and confidence %s", signal_type, asset, strength, confidence)
 
             return signal
 
@@ -101,13 +126,14 @@ class SignalGenerator:
             self.logger.error(f"Error generating signal: {str(e)}")
             return None
 
-    def generate_from_ai_analysis(self, ai_analysis: Dict[str, Any], market_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def generate_from_ai_analysis(self, ai_analysis: Dict[str, Any], market_data: Dict[str, Any], timestamp: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """
         基于 AI 模型分析结果生成信号
 
         Args:
             ai_analysis: AI 模型分析结果
             market_data: 市场数据
+            timestamp: 信号生成时间，为空时取当前时间
 
         Returns:
             信号列表
@@ -115,28 +141,13 @@ class SignalGenerator:
         try:
             signals = []
 
-            # 提取 AI 分析结果
-            sentiment_analysis = ai_analysis.get('sentiment_analysis', {})
-            price_prediction = ai_analysis.get('price_prediction', {})
-            anomaly_detection = ai_analysis.get('anomaly_detection', {})
-
-            # 处理情感分析结果
-            if sentiment_analysis:
-                sentiment_signal = self._generate_from_sentiment(sentiment_analysis, market_data)
-                if sentiment_signal:
-                    signals.append(sentiment_signal)
-
-            # 处理价格预测结果
-            if price_prediction:
-                price_signal = self._generate_from_price_prediction(price_prediction, market_data)
-                if price_signal:
-                    signals.append(price_signal)
-
-            # 处理异常检测结果
-            if anomaly_detection:
-                anomaly_signal = self._generate_from_anomaly_detection(anomaly_detection, market_data)
-                if anomaly_signal:
-                    signals.append(anomaly_signal)
+            # 依次处理情感分析、价格预测和异常检测结果
+            for key, handler in self._ai_handlers:
+                analysis = ai_analysis.get(key)
+                if analysis:
+                    signal = handler(analysis, market_data, timestamp)
+                    if signal:
+                        signals.append(signal)
 
             return signals
 
@@ -144,13 +155,30 @@ class SignalGenerator:
             self.logger.error(f"Error generating signals from AI analysis: {str(e)}")
             return []
 
-    def _generate_from_sentiment(self, sentiment_analysis: Dict[str, Any], market_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def generate_signals_batch(self, analyses: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        批量基于 AI 模型分析结果生成信号，整批共用一个生成时间
+
+        Args:
+            analyses: (AI 模型分析结果, 市场数据) 列表
+
+        Returns:
+            信号列表
+        """
+        timestamp = datetime.now()
+        signals = []
+        for ai_analysis, market_data in analyses:
+            signals.extend(self.generate_from_ai_analysis(ai_analysis, market_data, timestamp))
+        return signals
+
+    def _generate_from_sentiment(self, sentiment_analysis: Dict[str, Any], market_data: Dict[str, Any], timestamp: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
         """
         基于情感分析结果生成信号
 
         Args:
             sentiment_analysis: 情感分析结果
             market_data: 市场数据
+            timestamp: 信号生成时间
 
         Returns:
             信号对象
@@ -187,20 +215,22 @@ class SignalGenerator:
                 confidence=confidence,
                 trigger_conditions=trigger_conditions,
                 ai_analysis={'sentiment_analysis': sentiment_analysis},
-                market_data=market_data
+                market_data=market_data,
+                timestamp=timestamp
             )
 
         except Exception as e:
             self.logger.error(f"Error generating signal from sentiment analysis: {str(e)}")
             return None
 
-    def _generate_from_price_prediction(self, price_prediction: Dict[str, Any], market_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def _generate_from_price_prediction(self, price_prediction: Dict[str, Any], market_data: Dict[str, Any], timestamp: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
         """
         基于价格预测结果生成信号
 
         Args:
             price_prediction: 价格预测结果
             market_data: 市场数据
+            timestamp: 信号生成时间
 
         Returns:
             信号对象
@@ -239,20 +269,22 @@ class SignalGenerator:
                 confidence=confidence,
                 trigger_conditions=trigger_conditions,
                 ai_analysis={'price_prediction': price_prediction},
-                market_data=market_data
+                market_data=market_data,
+                timestamp=timestamp
             )
 
         except Exception as e:
             self.logger.error(f"Error generating signal from price prediction: {str(e)}")
             return None
 
-    def _generate_from_anomaly_detection(self, anomaly_detection: Dict[str, Any], market_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def _generate_from_anomaly_detection(self, anomaly_detection: Dict[str, Any], market_data: Dict[str, Any], timestamp: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
         """
         基于异常检测结果生成信号
 
         Args:
             anomaly_detection: 异常检测结果
             market_data: 市场数据
+            timestamp: 信号生成时间
 
         Returns:
             信号对象
@@ -287,7 +319,8 @@ class SignalGenerator:
                 confidence=confidence,
                 trigger_conditions=trigger_conditions,
                 ai_analysis={'anomaly_detection': anomaly_detection},
-                market_data=market_data
+                market_data=market_data,
+                timestamp=timestamp
             )
 
         except Exception as e:
@@ -330,18 +363,17 @@ class SignalGenerator:
         """
         asset = signal['asset']
         signal_type = signal['type']
-        strength = signal['strength']
-        confidence = signal['confidence']
-        level = signal['level']
 
-        descriptions = {
-            'buy': f"Strong {level} buy signal for {asset} with strength {strength}/10 and confidence {confidence:.2f}",
-            'sell': f"Strong {level} sell signal for {asset} with strength {strength}/10 and confidence {confidence:.2f}",
-            'hold': f"Neutral hold signal for {asset} with strength {strength}/10 and confidence {confidence:.2f}",
-            'alert': f"{level} alert signal for {asset} with strength {strength}/10 and confidence {confidence:.2f}"
-        }
+        template = DESCRIPTION_TEMPLATES.get(signal_type)
+        if template is None:
+            return f"{signal_type} signal for {asset}"
 
-        return descriptions.get(signal_type, f"{signal_type} signal for {asset}")
+        return template.format(
+            level=signal['level'],
+            asset=asset,
+            strength=signal['strength'],
+            confidence=signal['confidence']
+        )
 
     def validate_signal(self, signal: Dict[str, Any]) -> bool:
         """
@@ -355,31 +387,30 @@ class SignalGenerator:
         """
         try:
             # 检查必要字段
-            required_fields = ['signal_id', 'asset', 'type', 'strength', 'confidence', 'timestamp']
-            for field in required_fields:
-                if field not in signal:
-                    self.logger.error(f"Missing required field {field} in signal")
-                    return False
+            missing_fields = self.REQUIRED_FIELDS - signal.keys()
+            if missing_fields:
+                self.logger.error("Missing required fields %s in signal", sorted(missing_fields))
+                return False
 
             # 检查信号强度
             if not 1 <= signal['strength'] <= 10:
-                self.logger.error(f"Invalid signal strength: {signal['strength']}")
+                self.logger.error("Invalid signal strength: %s", signal['strength'])
                 return False
 
             # 检查信号置信度
             if not 0 <= signal['confidence'] <= 1:
-                self.logger.error(f"Invalid signal confidence: {signal['confidence']}")
+                self.logger.error("Invalid signal confidence: %s", signal['confidence'])
                 return False
 
             # 检查信号类型
             valid_types = ['buy', 'sell', 'hold', 'alert', 'opportunity', 'risk']
             if signal['type'] not in valid_types:
-                self.logger.error(f"Invalid signal type: {signal['type']}")
+                self.logger.error("Invalid signal type: %s", signal['type'])
                 return False
 
             # 检查信号状态
             if signal.get('status') not in ['active', 'expired', 'canceled']:
-                self.logger.error(f"Invalid signal status: {signal.get('status')}")
+                self.logger.error("Invalid signal status: %s", signal.get('status'))
                 return False
 
             return True
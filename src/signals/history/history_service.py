@@ -1,8 +1,70 @@
 # History Service
 
+import itertools
 import logging
-from datetime import datetime
-from typing import Dict, List, Optional, Any
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from importlib.util import find_spec
+from operator import itemgetter
+from typing import Dict, List, Optional, Any, Tuple
+
+# 列式导出依赖 (Parquet 导出需要 pandas + pyarrow): 只检查是否安装, 导出时才导入, 避免加载本模块时的导入开销
+PARQUET_AVAILABLE = find_spec('pandas') is not None and find_spec('pyarrow') is not None
+
+# 尝试导入 orjson (JSON 导出加速, 不可用时回退到标准库 json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# 支持等值过滤的历史记录字段
+HISTORY_FILTER_FIELDS = ('asset', 'type', 'status', 'level')
+
+# 统计分布 / 分组准确率使用的字段
+STATISTICS_FIELDS = ('type', 'asset', 'level')
+
+# (信号类型, 实际走势) -> 准确率; 未列出的组合 (如未知类型) 记为 0.5
+SIGNAL_ACCURACY_TABLE = {
+    ('buy', 'up'): 1.0,
+    ('buy', 'down'): 0.0,
+    ('buy', 'neutral'): 0.5,
+    ('sell', 'up'): 0.0,
+    ('sell', 'down'): 1.0,
+    ('sell', 'neutral'): 0.5,
+    ('hold', 'up'): 0.5,
+    ('hold', 'down'): 0.5,
+    ('hold', 'neutral'): 1.0
+}
+
+_get_total_predictions = itemgetter('total_predictions')
+_get_correct_predictions = itemgetter('correct_predictions')
+
+def _get_timestamp(signal: Dict[str, Any]) -> str:
+    # 时间索引按字符串比较: datetime 和 Unix 时间戳 (int/float) 转为 ISO 字符串, 其他类型无法与字符串比较, 直接报错
+    timestamp = signal.get('timestamp', '')
+    if isinstance(timestamp, str):
+        return timestamp
+    if isinstance(timestamp, datetime):
+        return timestamp.isoformat()
+    if isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool):
+        return datetime.fromtimestamp(timestamp).isoformat()
+    raise TypeError(f"Unsupported timestamp type: {type(timestamp).__name__}")
+
+def _json_default(value: Any) -> Any:
+    # orjson 无法直接序列化的值: numpy 标量转为 Python 原生类型, 其余交给回退路径
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def _bump(counts: Dict[Any, Any], key: Any, delta: Any):
+    # 计数归零时删除键, 与全量统计的结果保持一致
+    value = counts.get(key, 0) + delta
+    if value:
+        counts[key] = value
+    else:
+        del counts[key]
 
 class HistoryService:
     """
@@ -10,6 +72,9 @@ class HistoryService:
     管理信号历史记录和准确率追踪
     """
 
+    # 信号必要字段
+    REQUIRED_FIELDS = frozenset({'signal_id', 'asset', 'type', 'strength', 'confidence', 'timestamp'})
+
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         """
         初始化历史服务
@@ -20,13 +85,32 @@ class HistoryService:
         self.config = config or {}
         self.logger = logging.getLogger(__name__)
 
-        # 历史记录存储
-        self.signal_history = []
-        self.accuracy_tracking = {}
-
         # 配置参数
         self.max_history_size = self.config.get('max_history_size', 10000)
+        # 非正数上限不限制历史大小 (与原先列表切片 [-0:] 保留全部记录的行为一致)
+        self._history_maxlen = self.max_history_size if self.max_history_size and self.max_history_size > 0 else None
         self.accuracy_calculation_days = self.config.get('accuracy_calculation_days', 30)
+        self.max_predictions_per_signal = self.config.get('max_predictions_per_signal', 200)
+        self.export_columns = self.config.get('export_columns', [
+            'history_id', 'signal_id', 'asset', 'type', 'strength',
+            'confidence', 'timestamp', 'status', 'accuracy'
+        ])
+
+        # 历史记录存储
+        self.signal_history = deque(maxlen=self._history_maxlen)
+        self.accuracy_tracking = {}
+
+        # 过滤字段组合 -> 预编译的过滤函数
+        self._filter_selectors = {}
+
+        # signal_id -> 追踪记录创建顺序
+        self._tracking_order = {}
+
+        # signal_id 索引与增量统计
+        self._reset_indexes()
+
+        # 累计写入的历史记录数, 用于生成 history_id
+        self._history_seq = 0
 
     def add_signal_to_history(self, signal: Dict[str, Any]) -> bool:
         """
@@ -44,31 +128,73 @@ class HistoryService:
                 self.logger.error("Invalid signal for history")
                 return False
 
+            added_at = datetime.now().isoformat()
+
             # 添加到历史记录
             signal_with_history = signal.copy()
-            signal_with_history['history_id'] = f"hist_{len(self.signal_history)}_{signal['signal_id']}"
-            signal_with_history['added_to_history_at'] = datetime.now().isoformat()
+            signal_with_history['history_id'] = f"hist_{self._history_seq}_{signal['signal_id']}"
+            signal_with_history['added_to_history_at'] = added_at
             signal_with_history['status'] = 'active'
             signal_with_history['outcome'] = None  # 初始结果为 None
             signal_with_history['accuracy'] = None  # 初始准确率为 None
 
-            # 添加到历史记录
-            self.signal_history.append(signal_with_history)
-
-            # 限制历史记录大小
-            if len(self.signal_history) > self.max_history_size:
-                self.signal_history = self.signal_history[-self.max_history_size:]
+            # 添加到历史记录 (超出上限时淘汰最早的记录)
+            self._append_entry(signal_with_history)
 
             # 初始化准确率追踪
-            self._init_accuracy_tracking(signal['signal_id'])
+            self._init_accuracy_tracking(signal['signal_id'], added_at)
 
-            self.logger.info(f"Added signal {signal['signal_id']} to history")
+            self.logger.info("Added signal %s to history", signal['signal_id'])
             return True
 
         except Exception as e:
             self.logger.error(f"Error adding signal to history: {str(e)}")
             return False
 
+    def add_signals_to_history(self, signals: List[Dict[str, Any]]) -> int:
+        """
+        批量添加信号到历史记录
+
+        Args:
+            signals: 信号列表
+
+        Returns:
+            成功添加的数量
+        """
+        try:
+            added_at = datetime.now().isoformat()
+            added_count = 0
+            invalid_count = 0
+
+            for signal in signals:
+                # 验证信号 (无效信号整批汇总后记录一次日志)
+                if not self._validate_signal(signal):
+                    invalid_count += 1
+                    continue
+
+                signal_with_history = signal.copy()
+                signal_with_history['history_id'] = f"hist_{self._history_seq}_{signal['signal_id']}"
+                signal_with_history['added_to_history_at'] = added_at
+                signal_with_history['status'] = 'active'
+                signal_with_history['outcome'] = None  # 初始结果为 None
+                signal_with_history['accuracy'] = None  # 初始准确率为 None
+
+                self._append_entry(signal_with_history)
+
+                # 初始化准确率追踪
+                self._init_accuracy_tracking(signal['signal_id'], added_at)
+                added_count += 1
+
+            if invalid_count:
+                self.logger.error("Skipped %d invalid signals for history", invalid_count)
+
+            self.logger.info("Added %d signals to history", added_count)
+            return added_count
+
+        except Exception as e:
+            self.logger.error(f"Error adding signals to history: {str(e)}")
+            return 0
+
     def update_signal_outcome(self, signal_id: str, outcome: Dict[str, Any]) -> bool:
         """
         更新信号结果
@@ -84,22 +210,26 @@ class HistoryService:
             # 查找信号
             signal = self._find_signal_by_id(signal_id)
             if not signal:
-                self.logger.error(f"Signal not found: {signal_id}")
+                self.logger.error("Signal not found: %s", signal_id)
                 return False
 
+            updated_at = datetime.now().isoformat()
+
             # 更新结果
+            self._tally_outcome(signal, -1)
             signal['outcome'] = outcome
-            signal['outcome_updated_at'] = datetime.now().isoformat()
+            signal['outcome_updated_at'] = updated_at
             signal['status'] = 'completed'
 
             # 计算准确率
             accuracy = self._calculate_signal_accuracy(signal, outcome)
             signal['accuracy'] = accuracy
+            self._tally_outcome(signal, 1)
 
             # 更新准确率追踪
-            self._update_accuracy_tracking(signal_id, accuracy, outcome)
+            self._update_accuracy_tracking(signal_id, accuracy, outcome, updated_at)
 
-            self.logger.info(f"Updated outcome for signal {signal_id} with accuracy {accuracy}")
+            self.logger.info("Updated outcome for signal %s with accuracy %s", signal_id, accuracy)
             return True
 
         except Exception as e:
@@ -118,28 +248,35 @@ class HistoryService:
             信号历史列表
         """
         try:
+            # 无过滤条件: 直接从时间索引尾部取最新的 limit 条
+            if not filters and 0 < limit < len(self._time_index):
+                boundary = self._time_index[-limit][0]
+                start = bisect_left(self._time_index, (boundary,))
+                filtered_history = [item[2] for item in self._time_index[start:]]
+                filtered_history.sort(key=_get_timestamp, reverse=True)
+                return filtered_history[:limit]
+
             filtered_history = self.signal_history
 
-            # 应用过滤条件
+            # 时间范围先通过时间索引二分定位
+            if filters and 'time_range' in filters:
+                start_time, end_time = filters['time_range']
+                filtered_history = self._time_window(start_time, end_time)
+
+            # 应用其余过滤条件: 按字段组合取预编译的单次遍历过滤函数 (直接遍历历史记录, 不复制整个队列)
             if filters:
-                for key, value in filters.items():
-                    if key == 'asset':
-                        filtered_history = [s for s in filtered_history if s.get('asset') == value]
-                    elif key == 'type':
-                        filtered_history = [s for s in filtered_history if s.get('type') == value]
-                    elif key == 'status':
-                        filtered_history = [s for s in filtered_history if s.get('status') == value]
-                    elif key == 'level':
-                        filtered_history = [s for s in filtered_history if s.get('level') == value]
-                    elif key == 'time_range':
-                        start_time, end_time = value
-                        filtered_history = [
-                            s for s in filtered_history
-                            if start_time <= s.get('timestamp', '') <= end_time
-                        ]
+                fields = tuple(key for key in filters if key in HISTORY_FILTER_FIELDS)
+                if fields:
+                    select = self._filter_selectors.get(fields)
+                    if select is None:
+                        select = self._filter_selectors[fields] = self._compile_filter(fields)
+                    filtered_history = select(filtered_history, *[filters[field] for field in fields])
+
+            if filtered_history is self.signal_history:
+                filtered_history = list(filtered_history)
 
             # 按时间排序
-            filtered_history.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
+            filtered_history.sort(key=_get_timestamp, reverse=True)
 
             # 限制数量
             return filtered_history[:limit]
@@ -159,47 +296,40 @@ class HistoryService:
             统计信息
         """
         try:
-            # 过滤时间范围
             if time_range:
+                # 过滤时间范围后全量统计
                 start_time, end_time = time_range
-                filtered_history = [
-                    s for s in self.signal_history
-                    if start_time <= s.get('timestamp', '') <= end_time
-                ]
+                filtered_history = self._time_window(start_time, end_time)
+
+                # 基本统计
+                total_signals = len(filtered_history)
+                completed_signals = [s for s in filtered_history if s.get('status') == 'completed']
+                completed_count = len(completed_signals)
+                active_count = sum(1 for s in filtered_history if s.get('status') == 'active')
+
+                # 类型 / 资产 / 级别分布
+                type_distribution, asset_distribution, level_distribution = (
+                    dict(Counter(s.get(field, 'unknown') for s in filtered_history))
+                    for field in STATISTICS_FIELDS
+                )
+
+                # 准确率统计
+                accuracy_stats = self._calculate_accuracy_statistics(completed_signals)
             else:
-                filtered_history = self.signal_history
-
-            # 基本统计
-            total_signals = len(filtered_history)
-            completed_signals = [s for s in filtered_history if s.get('status') == 'completed']
-            active_signals = [s for s in filtered_history if s.get('status') == 'active']
-
-            # 信号类型分布
-            type_distribution = {}
-            for signal in filtered_history:
-                signal_type = signal.get('type', 'unknown')
-                type_distribution[signal_type] = type_distribution.get(signal_type, 0) + 1
-
-            # 资产分布
-            asset_distribution = {}
-            for signal in filtered_history:
-                asset = signal.get('asset', 'unknown')
-                asset_distribution[asset] = asset_distribution.get(asset, 0) + 1
-
-            # 级别分布
-            level_distribution = {}
-            for signal in filtered_history:
-                level = signal.get('level', 'unknown')
-                level_distribution[level] = level_distribution.get(level, 0) + 1
-
-            # 准确率统计
-            accuracy_stats = self._calculate_accuracy_statistics(completed_signals)
+                # 无时间范围时直接读取增量维护的统计
+                total_signals = len(self.signal_history)
+                completed_count = self._status_counts.get('completed', 0)
+                active_count = self._status_counts.get('active', 0)
+                type_distribution = dict(self._distributions['type'])
+                asset_distribution = dict(self._distributions['asset'])
+                level_distribution = dict(self._distributions['level'])
+                accuracy_stats = self._cached_accuracy_statistics()
 
             # 综合统计
             statistics = {
                 'total_signals': total_signals,
-                'completed_signals': len(completed_signals),
-                'active_signals': len(active_signals),
+                'completed_signals': completed_count,
+                'active_signals': active_count,
                 'type_distribution': type_distribution,
                 'asset_distribution': asset_distribution,
                 'level_distribution': level_distribution,
@@ -226,21 +356,30 @@ class HistoryService:
             准确率追踪信息
         """
         try:
-            # 过滤准确率追踪
-            filtered_tracking = {}
-            for signal_id, tracking in self.accuracy_tracking.items():
-                # 查找对应的信号
-                signal = self._find_signal_by_id(signal_id)
-                if not signal:
-                    continue
-
-                # 应用过滤条件
-                if asset and signal.get('asset') != asset:
-                    continue
-                if signal_type and signal.get('type') != signal_type:
-                    continue
-
-                filtered_tracking[signal_id] = tracking
+            # 过滤准确率追踪 (仅包含仍在历史记录中的信号)
+            if asset or signal_type:
+                # 通过资产 / 类型反向索引取候选 ID, 再按追踪记录的创建顺序输出
+                candidates = None
+                if asset:
+                    candidates = self._ids_by_asset.get(asset, set())
+                if signal_type:
+                    type_ids = self._ids_by_type.get(signal_type, set())
+                    candidates = type_ids if candidates is None else candidates & type_ids
+
+                tracking_order = self._tracking_order
+                filtered_tracking = {
+                    signal_id: self.accuracy_tracking[signal_id]
+                    for signal_id in sorted(
+                        (signal_id for signal_id in candidates if signal_id in tracking_order),
+                        key=tracking_order.__getitem__
+                    )
+                }
+            else:
+                filtered_tracking = {
+                    signal_id: tracking
+                    for signal_id, tracking in self.accuracy_tracking.items()
+                    if signal_id in self._index_by_id
+                }
 
             # 计算总体准确率
             overall_accuracy = self._calculate_overall_accuracy(filtered_tracking)
@@ -255,6 +394,29 @@ class HistoryService:
             self.logger.error(f"Error getting accuracy tracking: {str(e)}")
             return {}
 
+    def _compile_filter(self, fields: Tuple[str, ...]):
+        """
+        为一组过滤字段生成单次遍历的过滤函数
+
+        字段名均来自 HISTORY_FILTER_FIELDS, 直接写入生成的源码; 过滤值作为参数传入,
+        因此同一字段组合的查询共用一个函数。条件顺序与过滤条件的顺序一致, 逐个短路求值。
+
+        Args:
+            fields: 过滤字段 (按过滤条件顺序)
+
+        Returns:
+            过滤函数 select(history, *values) -> 匹配的历史记录列表
+        """
+        params = ', '.join(f"_v{index}" for index in range(len(fields)))
+        condition = ' and '.join(
+            f"s.get({field!r}) == _v{index}" for index, field in enumerate(fields)
+        )
+        source = f"def select(history, {params}):\n    return [s for s in history if {condition}]\n"
+
+        namespace = {}
+        exec(compile(source, f"<history filter {'/'.join(fields)}>", 'exec'), namespace)
+        return namespace['select']
+
     def _find_signal_by_id(self, signal_id: str) -> Optional[Dict[str, Any]]:
         """
         根据 ID 查找信号
@@ -265,29 +427,234 @@ class HistoryService:
         Returns:
             信号对象
         """
-        for signal in self.signal_history:
-            if signal.get('signal_id') == signal_id:
-                return signal
-        return None
+        return self._index_by_id.get(signal_id)
+
+    def _append_entry(self, entry: Dict[str, Any]):
+        """
+        追加历史记录并维护索引, 历史已满时先淘汰最早的记录
+
+        Args:
+            entry: 历史记录
+        """
+        # 先取时间索引键, 时间戳无效时在修改任何索引前报错
+        time_key = _get_timestamp(entry)
+
+        if len(self.signal_history) == self._history_maxlen:
+            self._evict_entry(self.signal_history.popleft())
+
+        self.signal_history.append(entry)
+        self._history_seq += 1
+
+        self._index_entry(entry, time_key)
+
+    def _index_entry(self, entry: Dict[str, Any], time_key: Optional[str] = None):
+        """
+        将历史记录计入 signal_id 索引和增量统计
+
+        Args:
+            entry: 历史记录
+            time_key: 时间索引键, 为空时从记录中读取
+        """
+        if time_key is None:
+            time_key = _get_timestamp(entry)
+
+        signal_id = entry['signal_id']
+        self._id_counts[signal_id] += 1
+        if signal_id not in self._index_by_id:
+            self._link_entry(signal_id, entry)
+        insort(self._time_index, (time_key, next(self._time_seq), entry))
+        self._tally_entry(entry, 1)
+
+    def _evict_entry(self, entry: Dict[str, Any]):
+        """
+        从索引中移除已淘汰的历史记录
+
+        Args:
+            entry: 被淘汰的历史记录
+        """
+        # 同一时间戳下被淘汰的记录总是最早写入的一条
+        position = bisect_left(self._time_index, (_get_timestamp(entry),))
+        while self._time_index[position][2] is not entry:
+            position += 1
+        del self._time_index[position]
+
+        self._unindex_entry(entry)
+
+    def _unindex_entry(self, entry: Dict[str, Any]):
+        """
+        将已移出历史记录的条目移出 signal_id 索引和增量统计 (不含时间索引)
+
+        Args:
+            entry: 已移出的历史记录
+        """
+        signal_id = entry['signal_id']
+        remaining = self._id_counts[signal_id] - 1
+        if remaining:
+            self._id_counts[signal_id] = remaining
+        else:
+            del self._id_counts[signal_id]
+
+        if self._index_by_id.get(signal_id) is entry:
+            self._unlink_entry(signal_id, entry)
+            if remaining:
+                # 重复 ID: 改为指向剩余记录中最早的一条
+                self._link_entry(signal_id, next(
+                    s for s in self.signal_history if s['signal_id'] == signal_id
+                ))
+
+        self._tally_entry(entry, -1)
+
+    def _link_entry(self, signal_id: str, entry: Dict[str, Any]):
+        """
+        将历史记录登记为 signal_id 对应的记录, 并加入资产 / 类型反向索引
+
+        Args:
+            signal_id: 信号 ID
+            entry: 历史记录
+        """
+        self._index_by_id[signal_id] = entry
+        self._ids_by_asset.setdefault(entry.get('asset'), set()).add(signal_id)
+        self._ids_by_type.setdefault(entry.get('type'), set()).add(signal_id)
+
+    def _unlink_entry(self, signal_id: str, entry: Dict[str, Any]):
+        """
+        撤销 signal_id 对应的记录登记, 并移出资产 / 类型反向索引
+
+        Args:
+            signal_id: 信号 ID
+            entry: 历史记录
+        """
+        del self._index_by_id[signal_id]
+        for ids_by_key, key in ((self._ids_by_asset, entry.get('asset')), (self._ids_by_type, entry.get('type'))):
+            ids = ids_by_key[key]
+            ids.discard(signal_id)
+            if not ids:
+                del ids_by_key[key]
+
+    def _reset_indexes(self):
+        """
+        清空 signal_id 索引和增量统计
+        """
+        self._index_by_id = {}
+        self._id_counts = Counter()
+
+        # 资产 / 类型 -> signal_id 集合的反向索引
+        self._ids_by_asset = {}
+        self._ids_by_type = {}
 
-    def _init_accuracy_tracking(self, signal_id: str):
+        # 按 (timestamp, 写入序号, 记录) 排序的时间索引
+        self._time_index = []
+        self._time_seq = itertools.count()
+
+        # 全部历史记录的分布与状态计数
+        self._distributions = {field: {} for field in STATISTICS_FIELDS}
+        self._status_counts = {}
+
+        # 已完成信号的准确率累计: 总和、正确数、按字段分组的 [总和, 数量]
+        self._accuracy_sum = 0.0
+        self._correct_count = 0
+        self._accuracy_groups = {field: {} for field in STATISTICS_FIELDS}
+
+    def _rebuild_index(self):
+        """
+        根据当前历史记录重建 signal_id 索引和增量统计
+        """
+        self._reset_indexes()
+        for entry in self.signal_history:
+            self._index_entry(entry)
+
+    def _time_window(self, start_time: str, end_time: str) -> List[Dict[str, Any]]:
+        """
+        通过时间索引二分查找时间范围内的历史记录
+
+        Args:
+            start_time: 开始时间
+            end_time: 结束时间
+
+        Returns:
+            时间范围内的历史记录 (按时间升序, 同一时间戳按写入顺序)
+        """
+        lo = bisect_left(self._time_index, (start_time,))
+        hi = bisect_right(self._time_index, (end_time, float('inf')))
+        return [item[2] for item in self._time_index[lo:hi]]
+
+    def _tally_entry(self, entry: Dict[str, Any], sign: int):
+        """
+        将历史记录计入 (sign=1) 或移出 (sign=-1) 增量统计
+
+        Args:
+            entry: 历史记录
+            sign: 1 或 -1
+        """
+        for field in STATISTICS_FIELDS:
+            _bump(self._distributions[field], entry.get(field, 'unknown'), sign)
+        self._tally_outcome(entry, sign)
+
+    def _tally_outcome(self, entry: Dict[str, Any], sign: int):
+        """
+        将历史记录的状态和准确率计入 (sign=1) 或移出 (sign=-1) 增量统计
+
+        Args:
+            entry: 历史记录
+            sign: 1 或 -1
+        """
+        status = entry.get('status')
+        _bump(self._status_counts, status, sign)
+        if status != 'completed':
+            return
+
+        accuracy = entry.get('accuracy', 0.0)
+        self._accuracy_sum += sign * accuracy
+        if accuracy >= 0.5:
+            self._correct_count += sign
+
+        for field in STATISTICS_FIELDS:
+            groups = self._accuracy_groups[field]
+            key = entry.get(field, 'unknown')
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = [0.0, 0]
+            group[0] += sign * accuracy
+            group[1] += sign
+            if not group[1]:
+                del groups[key]
+
+    def _cached_accuracy_statistics(self) -> Dict[str, Any]:
+        """
+        根据增量统计生成准确率统计, 结果与 _calculate_accuracy_statistics 一致
+
+        Returns:
+            准确率统计
+        """
+        total_completed = self._status_counts.get('completed', 0)
+        if not total_completed:
+            return self._calculate_accuracy_statistics([])
+
+        return self._summarize_accuracy(
+            self._accuracy_sum, self._correct_count, total_completed, self._accuracy_groups
+        )
+
+    def _init_accuracy_tracking(self, signal_id: str, created_at: str):
         """
         初始化准确率追踪
 
         Args:
             signal_id: 信号 ID
+            created_at: 创建时间 (ISO 格式)
         """
         if signal_id not in self.accuracy_tracking:
+            self._tracking_order[signal_id] = len(self._tracking_order)
             self.accuracy_tracking[signal_id] = {
                 'signal_id': signal_id,
                 'total_predictions': 0,
                 'correct_predictions': 0,
                 'accuracy': 0.0,
-                'last_updated': datetime.now().isoformat(),
+                'last_updated': created_at,
                 'predictions': []
             }
 
-    def _update_accuracy_tracking(self, signal_id: str, accuracy: float, outcome: Dict[str, Any]):
+    def _update_accuracy_tracking(self, signal_id: str, accuracy: float, outcome: Dict[str, Any],
+                                  updated_at: str):
         """
         更新准确率追踪
 
@@ -295,6 +662,7 @@ class HistoryService:
             signal_id: 信号 ID
             accuracy: 准确率
             outcome: 结果信息
+            updated_at: 更新时间 (ISO 格式)
         """
         if signal_id in self.accuracy_tracking:
             tracking = self.accuracy_tracking[signal_id]
@@ -306,13 +674,21 @@ class HistoryService:
             if tracking['total_predictions'] > 0:
                 tracking['accuracy'] = tracking['correct_predictions'] / tracking['total_predictions']
 
-            tracking['last_updated'] = datetime.now().isoformat()
-            tracking['predictions'].append({
+            tracking['last_updated'] = updated_at
+            predictions = tracking['predictions']
+            predictions.append({
                 'accuracy': accuracy,
                 'outcome': outcome,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': updated_at
             })
 
+            # 只保留最近的预测记录 (计数字段仍为累计值), 非正数上限不保留预测明细
+            max_predictions = self.max_predictions_per_signal
+            if max_predictions <= 0:
+                predictions.clear()
+            elif len(predictions) > max_predictions:
+                del predictions[:-max_predictions]
+
     def _calculate_signal_accuracy(self, signal: Dict[str, Any], outcome: Dict[str, Any]) -> float:
         """
         计算信号准确率
@@ -327,24 +703,7 @@ class HistoryService:
         try:
             signal_type = signal['type']
             actual_outcome = outcome.get('actual_outcome', 'neutral')
-            expected_direction = None
-
-            # 确定预期方向
-            if signal_type == 'buy':
-                expected_direction = 'up'
-            elif signal_type == 'sell':
-                expected_direction = 'down'
-            elif signal_type == 'hold':
-                expected_direction = 'neutral'
-
-            # 计算准确率
-            if expected_direction == actual_outcome:
-                return 1.0
-            elif (expected_direction == 'up' and actual_outcome == 'down') or \
-                 (expected_direction == 'down' and actual_outcome == 'up'):
-                return 0.0
-            else:
-                return 0.5
+            return SIGNAL_ACCURACY_TABLE.get((signal_type, actual_outcome), 0.5)
 
         except Exception as e:
             self.logger.error(f"Error calculating signal accuracy: {str(e)}")
@@ -370,72 +729,67 @@ class HistoryService:
                 'accuracy_by_level': {}
             }
 
-        # 计算总体准确率
-        accuracies = [s.get('accuracy', 0.0) for s in completed_signals]
-        average_accuracy = sum(accuracies) / len(accuracies)
-        correct_predictions = sum(1 for acc in accuracies if acc >= 0.5)
-
-        # 按类型计算准确率
-        accuracy_by_type = {}
-        type_counts = {}
-        for signal in completed_signals:
-            signal_type = signal.get('type', 'unknown')
-            accuracy = signal.get('accuracy', 0.0)
-
-            if signal_type not in accuracy_by_type:
-                accuracy_by_type[signal_type] = 0.0
-                type_counts[signal_type] = 0
-
-            accuracy_by_type[signal_type] += accuracy
-            type_counts[signal_type] += 1
-
-        for signal_type in accuracy_by_type:
-            if type_counts[signal_type] > 0:
-                accuracy_by_type[signal_type] /= type_counts[signal_type]
+        # 单次遍历累计总体与按字段分组的准确率
+        accuracy_sum = 0.0
+        correct_predictions = 0
+        groups = {field: {} for field in STATISTICS_FIELDS}
+        type_groups, asset_groups, level_groups = groups['type'], groups['asset'], groups['level']
 
-        # 按资产计算准确率
-        accuracy_by_asset = {}
-        asset_counts = {}
         for signal in completed_signals:
-            asset = signal.get('asset', 'unknown')
             accuracy = signal.get('accuracy', 0.0)
+            accuracy_sum += accuracy
+            if accuracy >= 0.5:
+                correct_predictions += 1
 
-            if asset not in accuracy_by_asset:
-                accuracy_by_asset[asset] = 0.0
-                asset_counts[asset] = 0
+            group = type_groups.get(signal.get('type', 'unknown'))
+            if group is None:
+                type_groups[signal.get('type', 'unknown')] = [accuracy, 1]
+            else:
+                group[0] += accuracy
+                group[1] += 1
 
-            accuracy_by_asset[asset] += accuracy
-            asset_counts[asset] += 1
+            group = asset_groups.get(signal.get('asset', 'unknown'))
+            if group is None:
+                asset_groups[signal.get('asset', 'unknown')] = [accuracy, 1]
+            else:
+                group[0] += accuracy
+                group[1] += 1
 
-        for asset in accuracy_by_asset:
-            if asset_counts[asset] > 0:
-                accuracy_by_asset[asset] /= asset_counts[asset]
+            group = level_groups.get(signal.get('level', 'unknown'))
+            if group is None:
+                level_groups[signal.get('level', 'unknown')] = [accuracy, 1]
+            else:
+                group[0] += accuracy
+                group[1] += 1
 
-        # 按级别计算准确率
-        accuracy_by_level = {}
-        level_counts = {}
-        for signal in completed_signals:
-            level = signal.get('level', 'unknown')
-            accuracy = signal.get('accuracy', 0.0)
+        return self._summarize_accuracy(accuracy_sum, correct_predictions, len(completed_signals), groups)
 
-            if level not in accuracy_by_level:
-                accuracy_by_level[level] = 0.0
-                level_counts[level] = 0
+    def _summarize_accuracy(self, accuracy_sum: float, correct_predictions: int,
+                            total_completed: int, groups: Dict[str, Dict[Any, List[Any]]]) -> Dict[str, Any]:
+        """
+        根据累计值生成准确率统计
 
-            accuracy_by_level[level] += accuracy
-            level_counts[level] += 1
+        Args:
+            accuracy_sum: 准确率总和
+            correct_predictions: 正确预测数
+            total_completed: 已完成信号数
+            groups: 按字段分组的 [准确率总和, 数量]
 
-        for level in accuracy_by_level:
-            if level_counts[level] > 0:
-                accuracy_by_level[level] /= level_counts[level]
+        Returns:
+            准确率统计
+        """
+        by_field = {
+            field: {key: total / count for key, (total, count) in field_groups.items()}
+            for field, field_groups in groups.items()
+        }
 
         return {
-            'average_accuracy': average_accuracy,
-            'total_completed': len(completed_signals),
+            'average_accuracy': accuracy_sum / total_completed,
+            'total_completed': total_completed,
             'correct_predictions': correct_predictions,
-            'accuracy_by_type': accuracy_by_type,
-            'accuracy_by_asset': accuracy_by_asset,
-            'accuracy_by_level': accuracy_by_level
+            'accuracy_by_type': by_field['type'],
+            'accuracy_by_asset': by_field['asset'],
+            'accuracy_by_level': by_field['level']
         }
 
     def _calculate_overall_accuracy(self, filtered_tracking: Dict[str, Any]) -> float:
@@ -451,12 +805,10 @@ class HistoryService:
         if not filtered_tracking:
             return 0.0
 
-        total_predictions = 0
-        correct_predictions = 0
-
-        for tracking in filtered_tracking.values():
-            total_predictions += tracking.get('total_predictions', 0)
-            correct_predictions += tracking.get('correct_predictions', 0)
+        # 追踪记录均由 _init_accuracy_tracking 创建, 计数字段必然存在
+        trackings = filtered_tracking.values()
+        total_predictions = sum(map(_get_total_predictions, trackings))
+        correct_predictions = sum(map(_get_correct_predictions, trackings))
 
         if total_predictions > 0:
             return correct_predictions / total_predictions
@@ -474,10 +826,8 @@ class HistoryService:
             是否有效
         """
         try:
-            required_fields = ['signal_id', 'asset', 'type', 'strength', 'confidence', 'timestamp']
-            for field in required_fields:
-                if field not in signal:
-                    return False
+            if not signal.keys() >= self.REQUIRED_FIELDS:
+                return False
 
             if not 1 <= signal['strength'] <= 10:
                 return False
@@ -485,6 +835,12 @@ class HistoryService:
             if not 0 <= signal['confidence'] <= 1:
                 return False
 
+            # 时间索引只支持 ISO 字符串、datetime 或有效的 Unix 时间戳
+            try:
+                _get_timestamp(signal)
+            except (TypeError, ValueError, OverflowError, OSError):
+                return False
+
             return True
 
         except Exception as e:
@@ -504,18 +860,32 @@ class HistoryService:
         try:
             if older_than_days:
                 # 计算时间阈值
-                import datetime as dt
-                threshold = (dt.datetime.now() - dt.timedelta(days=older_than_days)).isoformat()
-
-                # 过滤历史记录
-                self.signal_history = [
-                    s for s in self.signal_history
-                    if s.get('timestamp', '') >= threshold
-                ]
+                threshold = (datetime.now() - timedelta(days=older_than_days)).isoformat()
+
+                # 通过时间索引二分定位过期记录
+                cut = bisect_left(self._time_index, (threshold,))
+                expired = [item[2] for item in self._time_index[:cut]]
+                expired_ids = set(map(id, expired))
+
+                if all(id(s) in expired_ids for s in itertools.islice(self.signal_history, cut)):
+                    # 过期记录恰好位于队列头部 (按时间顺序写入): 逐条弹出
+                    del self._time_index[:cut]
+                    for _ in range(cut):
+                        self._unindex_entry(self.signal_history.popleft())
+                else:
+                    # 乱序写入: 过滤历史记录后重建索引
+                    self.signal_history = deque(
+                        (s for s in self.signal_history if id(s) not in expired_ids),
+                        maxlen=self._history_maxlen
+                    )
+                    self._rebuild_index()
             else:
                 # 清空历史记录
-                self.signal_history = []
+                self.signal_history.clear()
                 self.accuracy_tracking = {}
+                self._tracking_order = {}
+                self._reset_indexes()
+                self._history_seq = 0
 
             self.logger.info("Cleared history")
             return True
@@ -529,15 +899,26 @@ class HistoryService:
         导出历史记录
 
         Args:
-            format: 导出格式
+            format: 导出格式 (json / csv / parquet)
 
         Returns:
-            导出数据
+            导出数据 (parquet 为 bytes)
         """
         try:
             if format == 'json':
+                if ORJSON_AVAILABLE:
+                    try:
+                        return orjson.dumps(
+                            list(self.signal_history),
+                            default=_json_default,
+                            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+                        ).decode()
+                    except orjson.JSONEncodeError:
+                        # orjson 不支持的值 (如超过 64 位的整数) 回退到标准库 json
+                        pass
+
                 import json
-                return json.dumps(self.signal_history, indent=2)
+                return json.dumps(list(self.signal_history), indent=2, default=_json_default)
             elif format == 'csv':
                 import csv
                 import io
@@ -545,15 +926,34 @@ class HistoryService:
                 if not self.signal_history:
                     return output.getvalue()
 
-                # 提取字段名
-                fieldnames = list(self.signal_history[0].keys())
-                writer = csv.DictWriter(output, fieldnames=fieldnames)
+                # 只导出配置的列, 其余字段 (含 outcome 等嵌套字段) 忽略
+                writer = csv.DictWriter(output, fieldnames=self.export_columns, extrasaction='ignore')
                 writer.writeheader()
-                for signal in self.signal_history:
-                    writer.writerow(signal)
+                writer.writerows(self.signal_history)
+                return output.getvalue()
+            elif format == 'parquet':
+                if not PARQUET_AVAILABLE:
+                    self.logger.error("Parquet export requires pandas and pyarrow")
+                    return None
+
+                import io
+                import json
+                import pandas as pd
+                frame = pd.DataFrame(list(self.signal_history))
+
+                # 嵌套字段 (outcome、metadata 等) 以 JSON 字符串写入, 避免列类型推断失败
+                for column in frame.columns:
+                    values = frame[column]
+                    if values.map(lambda v: isinstance(v, (dict, list))).any():
+                        frame[column] = values.map(
+                            lambda v: json.dumps(v) if isinstance(v, (dict, list)) else v
+                        )
+
+                output = io.BytesIO()
+                frame.to_parquet(output, index=False, compression='snappy')
                 return output.getvalue()
             else:
-                self.logger.error(f"Unsupported export format: {format}")
+                self.logger.error("Unsupported export format: %s", format)
                 return None
 
         except Exception as e:
@@ -1,16 +1,101 @@
 # Notification Service
 
+import itertools
 import logging
+import threading
 import time
+from collections import deque
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 
+# 尝试导入 HTTP 客户端 (Webhook 投递需要 requests)
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+
+# 尝试导入数值计算库，用于向全部用户广播时批量比较阈值
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+# 阈值数组中表示"未配置该信号类型"的取值, 大于任何有效信号强度
+_MISSING_THRESHOLD = 127
+
+# 通知标题前缀 / 消息中的信号名称 (按信号类型)
+TITLE_PREFIXES = {
+    'buy': "🚀 买入信号",
+    'sell': "📉 卖出信号",
+    'alert': "⚠️ 预警信号",
+    'hold': "📊 持有信号"
+}
+
+SIGNAL_NAMES = {
+    'buy': "买入",
+    'sell': "卖出",
+    'alert': "预警",
+    'hold': "持有"
+}
+
+
+class NotificationRecord:
+    """
+    通知历史记录
+
+    历史中按 __slots__ 对象保存 (比 10 键字典更省内存), 对外返回时再转换为字典
+    """
+
+    __slots__ = ('notification_id', 'user_id', 'signal_id', 'signal_type', 'signal_strength',
+                 'signal_level', 'content', 'channels', 'timestamp', 'status')
+
+    def __init__(self, notification_id: str, user_id: str, signal_id: str, signal_type: str,
+                 signal_strength: Any, signal_level: str, content: Dict[str, Any],
+                 channels: Dict[str, bool], timestamp: str, status: str):
+        self.notification_id = notification_id
+        self.user_id = user_id
+        self.signal_id = signal_id
+        self.signal_type = signal_type
+        self.signal_strength = signal_strength
+        self.signal_level = signal_level
+        self.content = content
+        self.channels = channels
+        self.timestamp = timestamp
+        self.status = status
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        转换为通知字典
+
+        Returns:
+            通知字典
+        """
+        return {
+            'notification_id': self.notification_id,
+            'user_id': self.user_id,
+            'signal_id': self.signal_id,
+            'signal_type': self.signal_type,
+            'signal_strength': self.signal_strength,
+            'signal_level': self.signal_level,
+            'content': self.content,
+            'channels': self.channels,
+            'timestamp': self.timestamp,
+            'status': self.status
+        }
+
 class NotificationService:
     """
     通知服务
     处理信号通知和阈值管理
     """
 
+    # 信号必要字段
+    REQUIRED_FIELDS = frozenset({'signal_id', 'asset', 'type', 'strength', 'confidence'})
+
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         """
         初始化通知服务
@@ -33,6 +118,26 @@ class NotificationService:
         # 用户自定义阈值
         self.user_thresholds = {}
 
+        # 广播阈值数组: 信号类型 -> 按 _user_id_index 排列的 int8 阈值数组, 阈值变更后惰性重建
+        self.vector_min_users = self.config.get('vector_min_users', 64)
+        self._threshold_arrays = None
+        self._user_id_index = []
+
+        # 重复通知合并: 同一用户在窗口期内对同一 (资产, 类型, 级别) 只通知一次, 0 表示不合并
+        self.coalesce_ms = self.config.get('coalesce_ms', 10000)
+        self.coalesce_max_keys = self.config.get('coalesce_max_keys', 10000)
+        self._last_notified = {}
+
+        # 用户通知配置 (未单独配置的用户共用默认配置, 查询时不再每次新建)
+        self.default_notification_config = self.config.get('default_notification_config', {
+            'channels': ['system'],
+            'enabled': True
+        })
+        self.user_notification_configs = {}
+
+        # 用户 -> 已解析的 (渠道名, 发送方法) 元组, 配置变更时失效
+        self._resolved_channels = {}
+
         # 通知渠道
         self.channels = {
             'email': self._send_email_notification,
@@ -41,8 +146,40 @@ class NotificationService:
             'system': self._send_system_notification
         }
 
-        # 通知历史
-        self.notification_history = []
+        # 通知历史 (环形缓冲区, 超出上限时自动淘汰最早的记录)
+        self.history_max = self.config.get('history_max', 10000)
+        self.notification_history = deque(maxlen=self.history_max)
+        # 按用户索引的历史 (与 notification_history 共享记录对象, 随全局淘汰同步移除)
+        self._history_by_user = {}
+
+        # 通知 ID 序号 (同一秒内保证唯一) 与按秒缓存的时间戳前缀 (秒, ISO 字符串)
+        self._notification_seq = itertools.count(1)
+        self._timestamp_cache = (None, '')
+
+        # 历史写后缓冲: 配置持久化函数 (接收记录列表, 如包装一次 executemany) 后按批量上限或刷新间隔批量落盘
+        self.history_persister = self.config.get('history_persister')
+        self._history_flush_size = self.config.get('history_flush_size', 256)
+        self._history_flush_interval = self.config.get('history_flush_interval', 2.0)
+        self._history_buffer = []
+        self._history_timer = None
+        self._history_lock = threading.Lock()
+        # 批量上限与定时器两条落盘路径可能并发, 串行化持久化函数的调用以保证批次顺序
+        self._persist_lock = threading.Lock()
+
+        # Webhook 批量投递: 按 URL 缓冲事件, 达到批量上限或刷新间隔时合并为一次 POST
+        self.webhook_url = self.config.get('webhook_url')
+        self.webhook_batch_size = self.config.get('webhook_batch_size', 100)
+        self.webhook_flush_interval = self.config.get('webhook_flush_interval', 5.0)
+        self.webhook_timeout = self.config.get('webhook_timeout', 5)
+        # 投递失败的事件重新排队等待重试, 每个 URL 最多保留的事件数
+        self.webhook_max_buffer = self.config.get('webhook_max_buffer', self.webhook_batch_size * 10)
+        self._webhook_buffers = {}
+        self._webhook_timers = {}
+        self._webhook_lock = threading.Lock()
+        # 投递在后台定时器线程中进行, 串行化同一服务的 POST 以保证批次顺序 (flush_webhooks 会等待进行中的投递)
+        self._webhook_flush_lock = threading.RLock()
+        # 可注入与 requests.Session 兼容的会话 (如自定义重试/代理), 为空时首次投递时创建
+        self._webhook_session = self.config.get('webhook_session')
 
     def set_user_thresholds(self, user_id: str, thresholds: Dict[str, int]) -> bool:
         """
@@ -63,6 +200,7 @@ class NotificationService:
 
             # 保存用户阈值
             self.user_thresholds[user_id] = thresholds
+            self._threshold_arrays = None
             self.logger.info(f"Set thresholds for user {user_id}: {thresholds}")
 
             return True
@@ -104,6 +242,12 @@ class NotificationService:
                 self.logger.error("Invalid signal for notification")
                 return []
 
+            # 向全部用户广播时, 先用阈值数组一次筛出达到阈值的用户
+            if user_ids is None:
+                candidates = self._broadcast_candidates(signal)
+                if candidates is not None:
+                    return self._notify_candidates(candidates, signal)
+
             # 确定目标用户
             target_users = user_ids or self.user_thresholds.keys()
             if not target_users:
@@ -115,7 +259,7 @@ class NotificationService:
                 # 检查是否需要通知
                 if self._should_notify(user_id, signal):
                     # 发送通知
-                    notification = self._send_notification(user_id, signal)
+                    notification = self._notify_user(user_id, signal)
                     if notification:
                         notification_results.append(notification)
 
@@ -125,6 +269,110 @@ class NotificationService:
             self.logger.error(f"Error checking and sending notifications: {str(e)}")
             return []
 
+    def check_and_send_notifications_batch(self, signals: List[Dict[str, Any]], user_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        批量检查信号并发送通知
+
+        Args:
+            signals: 信号列表
+            user_ids: 用户 ID 列表
+
+        Returns:
+            通知结果列表
+        """
+        try:
+            if not self.notification_enabled:
+                self.logger.info("Notifications disabled")
+                return []
+
+            # 整批只确定一次目标用户
+            target_users = list(user_ids or self.user_thresholds.keys())
+            if not target_users:
+                target_users = ['default']  # 默认用户
+
+            notification_results = []
+            for signal in signals:
+                # 验证信号
+                if not self._validate_signal(signal):
+                    self.logger.error("Invalid signal for notification")
+                    continue
+
+                if user_ids is None:
+                    candidates = self._broadcast_candidates(signal)
+                    if candidates is not None:
+                        notification_results.extend(self._notify_candidates(candidates, signal))
+                        continue
+
+                for user_id in target_users:
+                    if self._should_notify(user_id, signal):
+                        notification = self._notify_user(user_id, signal)
+                        if notification:
+                            notification_results.append(notification)
+
+            return notification_results
+
+        except Exception as e:
+            self.logger.error(f"Error checking and sending batch notifications: {str(e)}")
+            return []
+
+    def _broadcast_candidates(self, signal: Dict[str, Any]) -> Optional[List[str]]:
+        """
+        用阈值数组一次比较出达到阈值的用户 (仅在用户数较多且 numpy 可用时)
+
+        Args:
+            signal: 已验证的信号对象
+
+        Returns:
+            达到阈值的用户 ID 列表 (保持用户顺序), 不适用时返回 None
+        """
+        if not NUMPY_AVAILABLE or len(self.user_thresholds) < self.vector_min_users:
+            return None
+
+        if self._threshold_arrays is None or len(self._user_id_index) != len(self.user_thresholds):
+            self._rebuild_threshold_arrays()
+
+        thresholds = self._threshold_arrays.get(signal['type'])
+        if thresholds is None:
+            return []
+
+        user_id_index = self._user_id_index
+        return [user_id_index[i] for i in np.flatnonzero(thresholds <= signal['strength'])]
+
+    def _rebuild_threshold_arrays(self) -> None:
+        """
+        按当前用户阈值重建各信号类型的阈值数组
+        """
+        self._user_id_index = list(self.user_thresholds)
+        size = len(self._user_id_index)
+
+        arrays = {}
+        for i, thresholds in enumerate(self.user_thresholds.values()):
+            for signal_type, threshold in thresholds.items():
+                values = arrays.get(signal_type)
+                if values is None:
+                    values = arrays[signal_type] = np.full(size, _MISSING_THRESHOLD, dtype=np.int8)
+                values[i] = threshold
+
+        self._threshold_arrays = arrays
+
+    def _notify_candidates(self, candidates: List[str], signal: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        向已达到阈值的用户发送通知 (仍按合并窗口去重)
+
+        Args:
+            candidates: 用户 ID 列表
+            signal: 信号对象
+
+        Returns:
+            通知结果列表
+        """
+        notification_results = []
+        for user_id in candidates:
+            notification = self._notify_user(user_id, signal)
+            if notification:
+                notification_results.append(notification)
+        return notification_results
+
     def _should_notify(self, user_id: str, signal: Dict[str, Any]) -> bool:
         """
         检查是否应该发送通知
@@ -140,21 +388,74 @@ class NotificationService:
             # 获取用户阈值
             thresholds = self.get_user_thresholds(user_id)
 
-            # 检查信号类型阈值
-            signal_type = signal['type']
-            if signal_type not in thresholds:
+            # 检查信号类型阈值及信号强度是否达到阈值
+            threshold = thresholds.get(signal['type'])
+            if threshold is None or not signal['strength'] >= threshold:
                 return False
 
-            # 检查信号强度是否达到阈值
-            signal_strength = signal['strength']
-            threshold = thresholds[signal_type]
-
-            return signal_strength >= threshold
+            return True
 
         except Exception as e:
             self.logger.error(f"Error checking notification condition: {str(e)}")
             return False
 
+    def _notify_user(self, user_id: str, signal: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        按合并窗口去重后发送通知; 发送失败 (无结果或所有渠道均失败) 时释放合并窗口
+
+        Args:
+            user_id: 用户 ID
+            signal: 信号对象
+
+        Returns:
+            通知结果 (被合并时为 None)
+        """
+        if self.coalesce_ms and not self._claim_notification(user_id, signal):
+            return None
+
+        notification = self._send_notification(user_id, signal)
+        if self.coalesce_ms and (not notification or notification['status'] != 'sent'):
+            self._release_notification(user_id, signal)
+        return notification
+
+    def _claim_notification(self, user_id: str, signal: Dict[str, Any]) -> bool:
+        """
+        登记一次通知; 若合并窗口内已通知过相同 (用户, 资产, 类型, 级别) 则拒绝
+
+        Args:
+            user_id: 用户 ID
+            signal: 信号对象
+
+        Returns:
+            是否应该通知
+        """
+        now = time.monotonic() * 1000
+        key = (user_id, signal.get('asset'), signal['type'], signal.get('level'))
+
+        last = self._last_notified.get(key)
+        if last is not None and now - last < self.coalesce_ms:
+            return False
+
+        self._last_notified[key] = now
+
+        # 记录过多时清理已过窗口期的键
+        if len(self._last_notified) > self.coalesce_max_keys:
+            cutoff = now - self.coalesce_ms
+            self._last_notified = {k: t for k, t in self._last_notified.items() if t > cutoff}
+
+        return True
+
+    def _release_notification(self, user_id: str, signal: Dict[str, Any]) -> None:
+        """
+        释放已登记的通知 (发送失败时调用, 使合并窗口内的下一次通知不被拦截)
+
+        Args:
+            user_id: 用户 ID
+            signal: 信号对象
+        """
+        key = (user_id, signal.get('asset'), signal['type'], signal.get('level'))
+        self._last_notified.pop(key, None)
+
     def _send_notification(self, user_id: str, signal: Dict[str, Any]) -> Dict[str, Any]:
         """
         发送通知
@@ -167,37 +468,52 @@ class NotificationService:
             通知结果
         """
         try:
-            # 获取用户通知配置
-            user_config = self._get_user_notification_config(user_id)
+            # 获取用户已解析的通知渠道
+            channels = self._resolved_channels.get(user_id)
+            if channels is None:
+                channels = self._resolve_user_channels(user_id)
 
             # 构建通知内容
             notification_content = self._build_notification_content(signal)
 
-            # 发送到各个渠道
+            # 发送到各个渠道 (单个渠道失败只标记该渠道, 不影响其他渠道和历史记录)
             channel_results = {}
-            for channel in user_config.get('channels', ['system']):
-                if channel in self.channels:
-                    result = self.channels[channel](user_id, notification_content)
-                    channel_results[channel] = result
-
-            # 记录通知历史
-            notification = {
-                'notification_id': f"notif_{int(time.time())}_{user_id}",
-                'user_id': user_id,
-                'signal_id': signal['signal_id'],
-                'signal_type': signal['type'],
-                'signal_strength': signal['strength'],
-                'signal_level': signal.get('level', 'unknown'),
-                'content': notification_content,
-                'channels': channel_results,
-                'timestamp': datetime.now().isoformat(),
-                'status': 'sent' if any(channel_results.values()) else 'failed'
-            }
-
-            self.notification_history.append(notification)
-            self.logger.info(f"Sent notification to user {user_id} for signal {signal['signal_id']}")
-
-            return notification
+            for channel, send in channels:
+                try:
+                    channel_results[channel] = send(user_id, notification_content)
+                except Exception as e:
+                    self.logger.error(f"Error sending {channel} notification: {str(e)}")
+                    channel_results[channel] = False
+
+            # 记录通知历史 (只读取一次时钟, 同一秒内复用已格式化的时间戳前缀)
+            second, nanos = divmod(time.time_ns(), 1_000_000_000)
+            cached_second, timestamp = self._timestamp_cache
+            if second != cached_second:
+                timestamp = datetime.fromtimestamp(second).isoformat()
+                self._timestamp_cache = (second, timestamp)
+            micros = nanos // 1000
+            if micros:
+                timestamp = f"{timestamp}.{micros:06d}"
+
+            record = NotificationRecord(
+                f"notif_{second}_{next(self._notification_seq)}_{user_id}",
+                user_id,
+                signal['signal_id'],
+                signal['type'],
+                signal['strength'],
+                signal.get('level', 'unknown'),
+                notification_content,
+                channel_results,
+                timestamp,
+                'sent' if any(channel_results.values()) else 'failed'
+            )
+
+            self._append_history(record)
+            if self.history_persister is not None:
+                self._buffer_history(record)
+            self.logger.info("Sent notification to user %s for signal %s", user_id, signal['signal_id'])
+
+            return record.to_dict()
 
         except Exception as e:
             self.logger.error(f"Error sending notification: {str(e)}")
@@ -220,24 +536,21 @@ class NotificationService:
         level = signal.get('level', 'unknown')
         description = signal.get('description', '')
 
-        # 构建标题和消息
-        titles = {
-            'buy': f"🚀 买入信号: {asset}",
-            'sell': f"📉 卖出信号: {asset}",
-            'alert': f"⚠️ 预警信号: {asset}",
-            'hold': f"📊 持有信号: {asset}"
-        }
-
-        messages = {
-            'buy': f"{asset} 生成买入信号\n强度: {strength}/10\n置信度: {confidence:.2f}\n级别: {level}\n{description}",
-            'sell': f"{asset} 生成卖出信号\n强度: {strength}/10\n置信度: {confidence:.2f}\n级别: {level}\n{description}",
-            'alert': f"{asset} 生成预警信号\n强度: {strength}/10\n置信度: {confidence:.2f}\n级别: {level}\n{description}",
-            'hold': f"{asset} 生成持有信号\n强度: {strength}/10\n置信度: {confidence:.2f}\n级别: {level}\n{description}"
-        }
+        # 只格式化当前信号类型对应的标题和消息
+        title_prefix = TITLE_PREFIXES.get(signal_type)
+        if title_prefix is None:
+            title = f"信号: {asset}"
+            message = description
+        else:
+            title = f"{title_prefix}: {asset}"
+            message = (
+                f"{asset} 生成{SIGNAL_NAMES[signal_type]}信号\n强度: {strength}/10\n"
+                f"置信度: {confidence:.2f}\n级别: {level}\n{description}"
+            )
 
         return {
-            'title': titles.get(signal_type, f"信号: {asset}"),
-            'message': messages.get(signal_type, description),
+            'title': title,
+            'message': message,
             'asset': asset,
             'signal_type': signal_type,
             'strength': strength,
@@ -259,21 +572,16 @@ class NotificationService:
         Returns:
             是否成功
         """
-        try:
-            # 这里应该集成实际的邮件发送服务
-            # 现在只是模拟实现
-            self.logger.info(f"Sending email notification to user {user_id}: {content['title']}")
-            # 实际实现示例:
-            # email_client.send_email(
-            #     to=user_email,
-            #     subject=content['title'],
-            #     body=content['message']
-            # )
-            return True
-
-        except Exception as e:
-            self.logger.error(f"Error sending email notification: {str(e)}")
-            return False
+        # 这里应该集成实际的邮件发送服务 (接入时在此处理发送异常)
+        # 现在只是模拟实现
+        self.logger.info("Sending email notification to user %s: %s", user_id, content['title'])
+        # 实际实现示例:
+        # email_client.send_email(
+        #     to=user_email,
+        #     subject=content['title'],
+        #     body=content['message']
+        # )
+        return True
 
     def _send_sms_notification(self, user_id: str, content: Dict[str, Any]) -> bool:
         """
@@ -286,20 +594,15 @@ class NotificationService:
         Returns:
             是否成功
         """
-        try:
-            # 这里应该集成实际的短信发送服务
-            # 现在只是模拟实现
-            self.logger.info(f"Sending SMS notification to user {user_id}: {content['title']}")
-            # 实际实现示例:
-            # sms_client.send_sms(
-            #     to=user_phone,
-            #     message=content['message'][:160]  # 短信长度限制
-            # )
-            return True
-
-        except Exception as e:
-            self.logger.error(f"Error sending SMS notification: {str(e)}")
-            return False
+        # 这里应该集成实际的短信发送服务 (接入时在此处理发送异常)
+        # 现在只是模拟实现
+        self.logger.info("Sending SMS notification to user %s: %s", user_id, content['title'])
+        # 实际实现示例:
+        # sms_client.send_sms(
+        #     to=user_phone,
+        #     message=content['message'][:160]  # 短信长度限制
+        # )
+        return True
 
     def _send_webhook_notification(self, user_id: str, content: Dict[str, Any]) -> bool:
         """
@@ -310,22 +613,200 @@ class NotificationService:
             content: 通知内容
 
         Returns:
-            是否成功
+            是否成功 (加入待投递缓冲区即视为成功)
         """
         try:
-            # 这里应该集成实际的 Webhook 发送服务
-            # 现在只是模拟实现
-            self.logger.info(f"Sending webhook notification to user {user_id}: {content['title']}")
-            # 实际实现示例:
-            # import requests
-            # webhook_url = user_webhook_url
-            # requests.post(webhook_url, json=content, timeout=5)
+            self.logger.info("Sending webhook notification to user %s: %s", user_id, content['title'])
+
+            # 未配置 Webhook 地址时只记录日志
+            url = self.webhook_url
+            if not url:
+                return True
+
+            # 加入该 URL 的缓冲区, 批量已满时由后台线程立即投递 (不阻塞调用方), 否则由定时器在刷新间隔后投递
+            with self._webhook_lock:
+                buffer = self._webhook_buffers.setdefault(url, [])
+                buffer.append({'user_id': user_id, 'content': content})
+                if len(buffer) == self.webhook_batch_size:
+                    self._schedule_webhook_flush(url, 0)
+                elif url not in self._webhook_timers:
+                    self._schedule_webhook_flush(url, self.webhook_flush_interval)
+
             return True
 
         except Exception as e:
             self.logger.error(f"Error sending webhook notification: {str(e)}")
             return False
 
+    def _schedule_webhook_flush(self, url: str, delay: float) -> None:
+        """
+        安排指定 URL 的一次后台投递, 替换已有的定时器 (调用方需持有 _webhook_lock)
+
+        Args:
+            url: Webhook 地址
+            delay: 延迟秒数
+        """
+        timer = self._webhook_timers.get(url)
+        if timer is not None:
+            timer.cancel()
+        timer = threading.Timer(delay, self._flush_webhook_batch, args=(url,))
+        timer.daemon = True
+        self._webhook_timers[url] = timer
+        timer.start()
+
+    def _flush_webhook_batch(self, url: str) -> bool:
+        """
+        将指定 URL 缓冲的 Webhook 事件合并为一次 POST 投递, 失败时事件重新排队等待重试
+
+        Args:
+            url: Webhook 地址
+
+        Returns:
+            是否成功 (缓冲区为空时为 True)
+        """
+        with self._webhook_flush_lock:
+            with self._webhook_lock:
+                batch = self._webhook_buffers.pop(url, None)
+                timer = self._webhook_timers.pop(url, None)
+            if timer is not None:
+                timer.cancel()
+            if not batch:
+                return True
+
+            try:
+                if self._webhook_session is None:
+                    if not REQUESTS_AVAILABLE:
+                        self.logger.error(f"Webhook delivery requires requests, dropping {len(batch)} events")
+                        return False
+
+                    session = requests.Session()
+                    session.mount('http://', HTTPAdapter(pool_connections=10, pool_maxsize=10))
+                    session.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=10))
+                    self._webhook_session = session
+
+                response = self._webhook_session.post(url, json={'events': batch}, timeout=self.webhook_timeout)
+                response.raise_for_status()
+                return True
+
+            except Exception as e:
+                self.logger.error(f"Error flushing webhook batch ({len(batch)} events): {str(e)}")
+                self._requeue_webhook_batch(url, batch)
+                return False
+
+    def _requeue_webhook_batch(self, url: str, batch: List[Dict[str, Any]]) -> None:
+        """
+        将投递失败的事件放回缓冲区头部并在刷新间隔后重试, 超出缓冲上限时丢弃最早的事件
+
+        Args:
+            url: Webhook 地址
+            batch: 投递失败的事件列表
+        """
+        with self._webhook_lock:
+            buffer = self._webhook_buffers.setdefault(url, [])
+            buffer[:0] = batch
+            overflow = len(buffer) - self.webhook_max_buffer
+            if overflow > 0:
+                dropped_users = sorted({event['user_id'] for event in buffer[:overflow]})
+                del buffer[:overflow]
+                self.logger.error(f"Webhook buffer full, dropped {overflow} events for users: {dropped_users}")
+            if not buffer:
+                del self._webhook_buffers[url]
+            elif url not in self._webhook_timers:
+                self._schedule_webhook_flush(url, self.webhook_flush_interval)
+
+    def flush_webhooks(self) -> bool:
+        """
+        等待进行中的投递完成后立即投递所有缓冲的 Webhook 事件 (用于关闭服务前)
+
+        Returns:
+            是否全部成功
+        """
+        with self._webhook_flush_lock:
+            with self._webhook_lock:
+                urls = list(self._webhook_buffers)
+            results = [self._flush_webhook_batch(url) for url in urls]
+        return all(results)
+
+    def _append_history(self, record: NotificationRecord) -> None:
+        """
+        追加通知记录到全局历史和用户索引, 全局历史已满时同步移除被淘汰的记录
+
+        Args:
+            record: 通知记录
+        """
+        history = self.notification_history
+        if len(history) == history.maxlen:
+            if not history:
+                # 历史上限为 0, 不保留任何记录
+                return
+            evicted = history[0]
+            user_history = self._history_by_user[evicted.user_id]
+            user_history.popleft()
+            if not user_history:
+                del self._history_by_user[evicted.user_id]
+
+        history.append(record)
+        user_history = self._history_by_user.get(record.user_id)
+        if user_history is None:
+            user_history = self._history_by_user[record.user_id] = deque()
+        user_history.append(record)
+
+    def _buffer_history(self, record: NotificationRecord) -> None:
+        """
+        将通知记录加入持久化缓冲区, 批量已满时立即落盘, 否则由定时器在刷新间隔后落盘
+
+        Args:
+            record: 通知记录
+        """
+        with self._history_lock:
+            self._history_buffer.append(record)
+            if len(self._history_buffer) < self._history_flush_size:
+                if self._history_timer is None:
+                    timer = threading.Timer(self._history_flush_interval, self._flush_history)
+                    timer.daemon = True
+                    self._history_timer = timer
+                    timer.start()
+                return
+
+        self._flush_history()
+
+    def _flush_history(self) -> bool:
+        """
+        将缓冲的通知记录一次性交给持久化函数
+
+        Returns:
+            是否成功 (缓冲区为空时为 True)
+        """
+        with self._persist_lock:
+            with self._history_lock:
+                batch = self._history_buffer
+                self._history_buffer = []
+                timer = self._history_timer
+                self._history_timer = None
+            if timer is not None:
+                timer.cancel()
+            if not batch:
+                return True
+
+            try:
+                self.history_persister([record.to_dict() for record in batch])
+                return True
+
+            except Exception as e:
+                self.logger.error(f"Error persisting notification history ({len(batch)} records): {str(e)}")
+                return False
+
+    def close(self) -> bool:
+        """
+        关闭服务前落盘缓冲的通知历史并投递缓冲的 Webhook 事件
+
+        Returns:
+            是否全部成功
+        """
+        history_flushed = self._flush_history() if self.history_persister is not None else True
+        webhooks_flushed = self.flush_webhooks()
+        return history_flushed and webhooks_flushed
+
     def _send_system_notification(self, user_id: str, content: Dict[str, Any]) -> bool:
         """
         发送系统通知
@@ -337,15 +818,10 @@ class NotificationService:
         Returns:
             是否成功
         """
-        try:
-            # 系统内部通知，存储到通知中心
-            self.logger.info(f"Sending system notification to user {user_id}: {content['title']}")
-            # 实际实现可能是存储到数据库或通知中心
-            return True
-
-        except Exception as e:
-            self.logger.error(f"Error sending system notification: {str(e)}")
-            return False
+        # 系统内部通知，存储到通知中心
+        self.logger.info("Sending system notification to user %s: %s", user_id, content['title'])
+        # 实际实现可能是存储到数据库或通知中心
+        return True
 
     def _validate_thresholds(self, thresholds: Dict[str, int]) -> bool:
         """
@@ -357,15 +833,11 @@ class NotificationService:
         Returns:
             是否有效
         """
-        try:
-            for signal_type, threshold in thresholds.items():
-                if not isinstance(threshold, int) or threshold < 0 or threshold > 10:
-                    return False
-            return True
-
-        except Exception as e:
-            self.logger.error(f"Error validating thresholds: {str(e)}")
-            return False
+        # 调用方 (set_user_thresholds / update_notification_config) 已统一捕获异常
+        for threshold in thresholds.values():
+            if not isinstance(threshold, int) or not 0 <= threshold <= 10:
+                return False
+        return True
 
     def _validate_signal(self, signal: Dict[str, Any]) -> bool:
         """
@@ -378,10 +850,8 @@ class NotificationService:
             是否有效
         """
         try:
-            required_fields = ['signal_id', 'asset', 'type', 'strength', 'confidence']
-            for field in required_fields:
-                if field not in signal:
-                    return False
+            if not signal.keys() >= self.REQUIRED_FIELDS:
+                return False
 
             if not 1 <= signal['strength'] <= 10:
                 return False
@@ -405,12 +875,47 @@ class NotificationService:
         Returns:
             通知配置
         """
-        # 这里应该从用户配置中获取
-        # 现在返回默认配置
-        return {
-            'channels': ['system'],
-            'enabled': True
-        }
+        return self.user_notification_configs.get(user_id, self.default_notification_config)
+
+    def set_user_notification_config(self, user_id: str, config: Dict[str, Any]) -> bool:
+        """
+        设置用户通知配置
+
+        Args:
+            user_id: 用户 ID
+            config: 通知配置
+
+        Returns:
+            是否成功
+        """
+        try:
+            self.user_notification_configs[user_id] = config
+            self._resolved_channels.pop(user_id, None)
+            self.logger.info(f"Set notification config for user {user_id}: {config}")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error setting user notification config: {str(e)}")
+            return False
+
+    def _resolve_user_channels(self, user_id: str) -> tuple:
+        """
+        解析并缓存用户配置中可用的通知渠道
+
+        Args:
+            user_id: 用户 ID
+
+        Returns:
+            (渠道名, 发送方法) 元组
+        """
+        user_config = self._get_user_notification_config(user_id)
+        channels = tuple(
+            (channel, self.channels[channel])
+            for channel in user_config.get('channels', ['system'])
+            if channel in self.channels
+        )
+        self._resolved_channels[user_id] = channels
+        return channels
 
     def get_notification_history(self, user_id: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
         """
@@ -424,12 +929,23 @@ class NotificationService:
             通知历史列表
         """
         try:
+            if limit <= 0:
+                # 非正数 limit 保持列表切片 [-limit:] 的语义
+                if user_id:
+                    history = list(self._history_by_user.get(user_id, ()))
+                else:
+                    history = list(self.notification_history)
+                return [n.to_dict() for n in history[-limit:]]
+
+            # 从队尾倒序取最近的 limit 条, 不复制整个历史
             if user_id:
-                history = [n for n in self.notification_history if n['user_id'] == user_id]
+                recent = reversed(self._history_by_user.get(user_id, ()))
             else:
-                history = self.notification_history
+                recent = reversed(self.notification_history)
 
-            return history[-limit:]
+            history = [n.to_dict() for n in itertools.islice(recent, limit)]
+            history.reverse()
+            return history
 
         except Exception as e:
             self.logger.error(f"Error getting notification history: {str(e)}")
@@ -453,6 +969,12 @@ class NotificationService:
                 if self._validate_thresholds(config['default_thresholds']):
                     self.default_thresholds = config['default_thresholds']
 
+            if 'default_notification_config' in config:
+                self.default_notification_config = config['default_notification_config']
+
+            # 渠道解析结果依赖通知配置, 更新后全部失效
+            self._resolved_channels.clear()
+
             self.logger.info("Updated notification config")
             return True
 
@@ -472,9 +994,14 @@ class NotificationService:
         """
         try:
             if user_id:
-                self.notification_history = [n for n in self.notification_history if n['user_id'] != user_id]
+                if self._history_by_user.pop(user_id, None) is not None:
+                    self.notification_history = deque(
+                        (n for n in self.notification_history if n.user_id != user_id),
+                        maxlen=self.history_max
+                    )
             else:
-                self.notification_history = []
+                self.notification_history.clear()
+                self._history_by_user.clear()
 
             self.logger.info(f"Cleared notification history for user {user_id if user_id else 'all users'}")
             return True
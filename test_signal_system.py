@@ -2,7 +2,9 @@
 
 import logging
 import sys
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta
 
 # 设置日志
 logging.basicConfig(
@@ -99,6 +101,39 @@ class TestSignalSystem:
             logger.error(f"Error testing signal generation: {str(e)}")
             return False
 
+    def test_signal_expiry(self):
+        """
+        测试信号有效期按信号时间计算
+        """
+        logger.info("Testing signal expiry...")
+
+        try:
+            timestamp = datetime(2024, 1, 1, 12, 0, 0)
+            signal = self.signal_generator.generate_signal(
+                asset="BTC",
+                signal_type="buy",
+                strength=7,
+                confidence=0.8,
+                trigger_conditions={"test": True},
+                timestamp=timestamp
+            )
+
+            if not signal:
+                logger.error("Failed to generate signal for expiry test")
+                return False
+
+            expected_expiry = timestamp + timedelta(hours=self.signal_generator.signal_expiry_hours)
+            if signal['timestamp'] != timestamp.isoformat() or signal['expiry_time'] != expected_expiry.isoformat():
+                logger.error(f"Unexpected expiry: {signal['timestamp']} -> {signal['expiry_time']}")
+                return False
+
+            logger.info(f"Signal expiry: {signal['timestamp']} -> {signal['expiry_time']}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error testing signal expiry: {str(e)}")
+            return False
+
     def test_ai_based_signal_generation(self):
         """
         测试基于 AI 分析的信号生成
@@ -196,6 +231,53 @@ class TestSignalSystem:
             logger.error(f"Error testing signal evaluation: {str(e)}")
             return False
 
+    def test_min_score_with_out_of_range_context(self):
+        """
+        测试超出范围的 AI 置信度和市场流动性不会导致 min_score 误过滤
+        """
+        logger.info("Testing min_score with out-of-range context...")
+
+        try:
+            # 批量路径阈值调低，使两个信号即走按列计算
+            signal_evaluator = SignalEvaluator({"batch_min_signals": 2})
+            historical_data = {"BTC": {"market_trend": "bullish", "volatility": 0.01, "liquidity": 5.0}}
+            signals = [
+                self.signal_generator.generate_signal(
+                    asset="BTC",
+                    signal_type="buy",
+                    strength=strength,
+                    confidence=0.75,
+                    trigger_conditions={"price_breakout": True},
+                    ai_analysis={"sentiment_analysis": {"confidence": 3.0}},
+                    market_data={"current_price": 45000}
+                )
+                for strength in (6, 8)
+            ]
+
+            evaluation = signal_evaluator.evaluate_signal(signals[0], historical_data)
+            scores = evaluation['dimension_scores']
+            if scores['ai_analysis'] > 1 or scores['market_context'] > 1:
+                logger.error(f"Dimension scores out of range: {scores}")
+                return False
+
+            # 以实际综合分数作为最低分数，单个和批量评估都应保留该信号
+            min_score = evaluation['overall_score']
+            if not signal_evaluator.evaluate_signal(signals[0], historical_data, min_score=min_score):
+                logger.error("Signal pruned by min_score in single evaluation")
+                return False
+
+            evaluations = signal_evaluator.evaluate_multiple_signals(signals, historical_data, min_score=min_score)
+            if [e['signal_id'] for e in evaluations] != [s['signal_id'] for s in signals]:
+                logger.error(f"Signals pruned by min_score in batch evaluation: {len(evaluations)}")
+                return False
+
+            logger.info("Out-of-range context values clamped, min_score pruning kept the signals")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error testing min_score with out-of-range context: {str(e)}")
+            return False
+
     def test_signal_classification(self):
         """
         测试信号分类
@@ -353,6 +435,240 @@ class TestSignalSystem:
             logger.error(f"Error testing history service: {str(e)}")
             return False
 
+    def test_batch_history_and_notifications(self):
+        """
+        测试批量写入历史和批量发送通知
+        """
+        logger.info("Testing batch history and notifications...")
+
+        try:
+            signals = [
+                self.signal_generator.generate_signal(
+                    asset=asset,
+                    signal_type="buy",
+                    strength=strength,
+                    confidence=0.8,
+                    trigger_conditions={"test": True}
+                )
+                for asset, strength in (("BTC", 8), ("ETH", 5), ("SOL", 9))
+            ]
+
+            # 批量写入历史，无效信号被跳过
+            history_service = HistoryService()
+            added = history_service.add_signals_to_history(signals + [{"signal_id": "invalid"}])
+            history = history_service.get_signal_history(limit=10)
+            if added != 3 or len(history) != 3:
+                logger.error(f"Unexpected batch history result: added {added}, history {len(history)}")
+                return False
+            logger.info(f"Added {added} signals to history in one batch")
+
+            # 批量发送通知，只通知强度达到阈值的信号
+            notification_service = NotificationService({"coalesce_ms": 0})
+            notification_service.set_user_thresholds("batch_user", {"buy": 6})
+            notifications = notification_service.check_and_send_notifications_batch(signals, ["batch_user"])
+            notified = sorted(notification['signal_id'] for notification in notifications)
+            expected = sorted(signal['signal_id'] for signal in signals if signal['strength'] >= 6)
+            if notified != expected:
+                logger.error(f"Unexpected batch notifications: {notified}")
+                return False
+            logger.info(f"Sent {len(notifications)} batch notifications")
+
+            return True
+
+        except Exception as e:
+            logger.error(f"Error testing batch history and notifications: {str(e)}")
+            return False
+
+    def test_notification_coalescing(self):
+        """
+        测试合并窗口内的重复通知
+        """
+        logger.info("Testing notification coalescing...")
+
+        try:
+            notification_service = NotificationService({"coalesce_ms": 60000})
+            user_id = "coalesce_user"
+            notification_service.set_user_thresholds(user_id, {"buy": 6})
+
+            signal = self.signal_generator.generate_signal(
+                asset="BTC",
+                signal_type="buy",
+                strength=8,
+                confidence=0.8,
+                trigger_conditions={"test": True}
+            )
+
+            # 窗口内相同 (资产, 类型, 级别) 只通知一次，其他资产不受影响
+            first = notification_service.check_and_send_notifications(signal, [user_id])
+            repeated = notification_service.check_and_send_notifications(signal, [user_id])
+            other_asset = notification_service.check_and_send_notifications(dict(signal, asset="ETH"), [user_id])
+            if len(first) != 1 or repeated or len(other_asset) != 1:
+                logger.error(f"Unexpected coalescing result: {len(first)}, {len(repeated)}, {len(other_asset)}")
+                return False
+
+            # 发送失败时不占用合并窗口
+            def failing_sender(user_id, content):
+                raise RuntimeError("channel unavailable")
+
+            notification_service.channels['email'] = failing_sender
+            notification_service.set_user_notification_config(user_id, {"channels": ["email"]})
+            failed = notification_service.check_and_send_notifications(dict(signal, asset="SOL"), [user_id])
+            notification_service.set_user_notification_config(user_id, {"channels": ["system"]})
+            retried = notification_service.check_and_send_notifications(dict(signal, asset="SOL"), [user_id])
+            if not failed or failed[0]['status'] != 'failed' or len(retried) != 1 or retried[0]['status'] != 'sent':
+                logger.error("Failed notification blocked the coalescing window")
+                return False
+
+            logger.info("Repeat notifications coalesced, failed notifications released")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error testing notification coalescing: {str(e)}")
+            return False
+
+    def test_notification_history_persistence(self):
+        """
+        测试通知历史批量持久化
+        """
+        logger.info("Testing notification history persistence...")
+
+        try:
+            persisted_batches = []
+            notification_service = NotificationService({
+                "coalesce_ms": 0,
+                "history_persister": persisted_batches.append,
+                "history_flush_size": 2,
+                "history_flush_interval": 60
+            })
+
+            signal = self.signal_generator.generate_signal(
+                asset="BTC",
+                signal_type="buy",
+                strength=8,
+                confidence=0.8,
+                trigger_conditions={"test": True}
+            )
+
+            # 达到批量上限时落盘一次，剩余记录在 close() 时落盘
+            for user_id in ("persist_user_1", "persist_user_2", "persist_user_3"):
+                notification_service.check_and_send_notifications(signal, [user_id])
+            sizes_before_close = [len(batch) for batch in persisted_batches]
+            closed = notification_service.close()
+            sizes_after_close = [len(batch) for batch in persisted_batches]
+
+            if sizes_before_close != [2] or not closed or sizes_after_close != [2, 1]:
+                logger.error(f"Unexpected persisted batches: {sizes_before_close} -> {sizes_after_close}")
+                return False
+
+            persisted_users = [record['user_id'] for batch in persisted_batches for record in batch]
+            if persisted_users != ["persist_user_1", "persist_user_2", "persist_user_3"]:
+                logger.error(f"Unexpected persisted records: {persisted_users}")
+                return False
+
+            # 未满批量的记录在刷新间隔后由定时器落盘
+            timer_batches = []
+            timer_service = NotificationService({
+                "coalesce_ms": 0,
+                "history_persister": timer_batches.append,
+                "history_flush_size": 100,
+                "history_flush_interval": 0.05
+            })
+            timer_service.check_and_send_notifications(signal, ["persist_user_4"])
+            deadline = time.time() + 2
+            while not timer_batches and time.time() < deadline:
+                time.sleep(0.01)
+            timer_sizes = [len(batch) for batch in timer_batches]
+            if timer_sizes != [1] or not timer_service.close() or len(timer_batches) != 1:
+                logger.error(f"Unexpected timer-persisted batches: {timer_sizes}")
+                return False
+
+            logger.info(f"Persisted notification history in batches of {sizes_after_close}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error testing notification history persistence: {str(e)}")
+            return False
+
+    def test_webhook_batching(self):
+        """
+        测试 Webhook 通知按批量投递
+        """
+        logger.info("Testing webhook batching...")
+
+        class RecordingSession:
+            """
+            记录 POST 请求 (事件数, 投递线程) 的测试会话, failures 次数内投递失败
+            """
+
+            def __init__(self):
+                self.posts = []
+                self.failures = 0
+
+            def post(self, url, json=None, timeout=None):
+                self.posts.append((len(json['events']), threading.get_ident()))
+                return self
+
+            def raise_for_status(self):
+                if self.failures > 0:
+                    self.failures -= 1
+                    raise RuntimeError("webhook endpoint unavailable")
+
+        def wait_for_posts(session, count):
+            deadline = time.time() + 2
+            while len(session.posts) < count and time.time() < deadline:
+                time.sleep(0.01)
+
+        try:
+            session = RecordingSession()
+            notification_service = NotificationService({
+                "coalesce_ms": 0,
+                "webhook_url": "https://hooks.example.com/signals",
+                "webhook_batch_size": 2,
+                "webhook_flush_interval": 60,
+                "webhook_session": session
+            })
+            user_id = "webhook_user"
+            notification_service.set_user_notification_config(user_id, {"channels": ["webhook"]})
+
+            signal = self.signal_generator.generate_signal(
+                asset="BTC",
+                signal_type="buy",
+                strength=8,
+                confidence=0.8,
+                trigger_conditions={"test": True}
+            )
+
+            # 达到批量上限时由后台线程合并为一次 POST，不在调用方线程投递
+            for _ in range(2):
+                notification_service.check_and_send_notifications(signal, [user_id])
+            wait_for_posts(session, 1)
+            if [size for size, _ in session.posts] != [2] or session.posts[0][1] == threading.get_ident():
+                logger.error(f"Full webhook batch not delivered in background: {session.posts}")
+                return False
+
+            # 投递失败的事件重新排队，由 flush_webhooks() 重试投递
+            session.failures = 1
+            for _ in range(2):
+                notification_service.check_and_send_notifications(signal, [user_id])
+            wait_for_posts(session, 2)
+            retried = notification_service.flush_webhooks()
+
+            # 未满批量的剩余事件由 flush_webhooks() 投递
+            notification_service.check_and_send_notifications(signal, [user_id])
+            flushed = notification_service.flush_webhooks()
+            flushed_sizes = [size for size, _ in session.posts]
+
+            if not retried or not flushed or flushed_sizes != [2, 2, 2, 1]:
+                logger.error(f"Unexpected webhook batches: {flushed_sizes}")
+                return False
+
+            logger.info(f"Delivered webhook events in batches of {flushed_sizes}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error testing webhook batching: {str(e)}")
+            return False
+
     def test_api_service(self):
         """
         测试 API 服务
@@ -399,11 +715,17 @@ class TestSignalSystem:
 
         tests = [
             ("Signal Generation", self.test_signal_generation),
+            ("Signal Expiry", self.test_signal_expiry),
             ("AI-based Signal Generation", self.test_ai_based_signal_generation),
             ("Signal Evaluation", self.test_signal_evaluation),
+            ("Min Score with Out-of-range Context", self.test_min_score_with_out_of_range_context),
             ("Signal Classification", self.test_signal_classification),
             ("Notification Service", self.test_notification_service),
             ("History Service", self.test_history_service),
+            ("Batch History and Notifications", self.test_batch_history_and_notifications),
+            ("Notification Coalescing", self.test_notification_coalescing),
+            ("Notification History Persistence", self.test_notification_history_persistence),
+            ("Webhook Batching", self.test_webhook_batching),
             ("API Service", self.test_api_service)
         ]
 
@@ -429,12 +751,19 @@ class TestSignalSystem:
 
         return passed_tests == total_tests
 
+    def close(self):
+        """
+        释放测试组件持有的资源
+        """
+        self.rule_engine.close()
+
 if __name__ == "__main__":
     """
     运行测试
     """
     test_system = TestSignalSystem()
     success = test_system.run_all_tests()
+    test_system.close()
 
     if success:
         logger.info("\n✅ All tests passed! Signal system is working correctly.")